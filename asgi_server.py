@@ -0,0 +1,159 @@
+"""Punto de entrada ASGI junto a ``backend_server.app``.
+
+    uvicorn asgi_server:app --port 5000
+
+Las rutas que el dashboard consulta en paralelo se sirven con handlers
+asíncronos: ``/api/hotels`` y ``/api/events`` usan el ``httpx.AsyncClient``
+compartido (supabase_async) y la misma caché por usuario que Flask, y los
+endpoints de scraping esperan a sus jobs con ``await`` en lugar de ocupar un
+hilo. Todo lo demás se delega a la app de Flask montada como WSGI, así que el
+comportamiento y las respuestas son los mismos en ambos servidores.
+"""
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+import backend_server
+from backend_server import (
+    RESPONSE_CACHE, DEFAULT_LIST_PARAMS, cache_response, find_job_for, job_output,
+    submit_eventos_job, submit_propio_job,
+)
+from hotels_query import build_hotels_query
+from metrics import HTTP_LATENCY
+import supabase_async
+
+# Cada cuánto revisan los handlers async si un job avanzó (no ocupa hilos)
+JOB_POLL_SECONDS = 0.5
+
+
+async def _cached_get(request, table, params=None, limit=None):
+    user_jwt = request.headers.get('x-user-jwt')
+    cache_key = (table, request.url.query.encode('utf-8'))
+    cached = RESPONSE_CACHE.get(user_jwt, cache_key)
+    if cached is None:
+        response = await supabase_async.get(table, jwt=user_jwt, params=params or DEFAULT_LIST_PARAMS)
+        if response.status_code != 200:
+            return JSONResponse({'error': f'Supabase error: {response.status_code}', 'details': response.text},
+                                status_code=response.status_code)
+        cached = cache_response(user_jwt, cache_key, response.content, limit)
+    body, headers = cached
+    return Response(body, media_type='application/json', headers=headers)
+
+
+async def get_hotels(request):
+    try:
+        params, limit = build_hotels_query(request.query_params)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    try:
+        return await _cached_get(request, 'hotels', params, limit)
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def get_events(request):
+    try:
+        return await _cached_get(request, 'events')
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def _wait_job(job):
+    while not job.finished:
+        await asyncio.sleep(JOB_POLL_SECONDS)
+    body, status = job_output(job)
+    return JSONResponse(body, status_code=status)
+
+
+async def run_scrapeo_geo(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    job = submit_eventos_job(data or {}, request.headers.get('x-user-jwt'))
+    return await _wait_job(job)
+
+
+async def run_scrape_hotel_propio(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    job = submit_propio_job(data or {})
+    if job is None:
+        return JSONResponse({'status': 'error', 'message': 'user_id y hotel_name requeridos'}, status_code=400)
+    return await _wait_job(job)
+
+
+async def job_events(request):
+    token = request.headers.get('x-user-jwt') or request.query_params.get('access_token')
+    job = find_job_for(request.path_params['job_id'], token)
+    if job is None:
+        return JSONResponse({'error': 'job no encontrado'}, status_code=404)
+    try:
+        last_seq = int(request.headers.get('last-event-id') or request.query_params.get('after', 0))
+    except ValueError:
+        last_seq = 0
+
+    async def stream():
+        seq = last_seq
+        idle = 0.0
+        while True:
+            finished = job.finished
+            events = job.events_after(seq, timeout=0)
+            for seq, event in events:
+                yield f"id: {seq}\nevent: {event.get('event', 'message')}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+            if events:
+                idle = 0.0
+                continue
+            if finished:
+                break
+            await asyncio.sleep(JOB_POLL_SECONDS)
+            idle += JOB_POLL_SECONDS
+            if idle >= 15:
+                idle = 0.0
+                yield ': keep-alive\n\n'
+
+    return StreamingResponse(stream(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def _timed(route, handler):
+    """Registra la latencia de los handlers async en la misma métrica que las rutas de Flask"""
+    async def wrapper(request):
+        start = time.perf_counter()
+        response = await handler(request)
+        HTTP_LATENCY.observe(time.perf_counter() - start, route=route, method=request.method,
+                             status=response.status_code)
+        return response
+    return wrapper
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await supabase_async.aclose()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/hotels', _timed('/api/hotels', get_hotels), methods=['GET']),
+        Route('/api/events', _timed('/api/events', get_events), methods=['GET']),
+        Route('/run-scrapeo-geo', _timed('/run-scrapeo-geo', run_scrapeo_geo), methods=['POST']),
+        Route('/run-scrape-hotel-propio', _timed('/run-scrape-hotel-propio', run_scrape_hotel_propio),
+              methods=['POST']),
+        Route('/jobs/{job_id}/events', job_events, methods=['GET']),
+        # El resto (POST /api/hotels, /metrics, /jobs/<id>, /hoteles-tijuana-json, ...) lo atiende Flask
+        Mount('/', WSGIMiddleware(backend_server.app)),
+    ],
+    lifespan=lifespan,
+)
+app.add_middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'],
+                   expose_headers=['X-Next-Cursor'])
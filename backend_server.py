@@ -1,21 +1,49 @@
-from flask import Flask, jsonify, send_file, request
+from flask import Flask, jsonify, send_file, request, g
 from flask_cors import CORS
-import subprocess
 import os
-import requests
 from dotenv import load_dotenv
 import json
 import asyncio
 import re
 from datetime import datetime, timedelta
-from supabase import create_client
 from playwright.async_api import async_playwright
+from job_queue import JobQueue
+import supabase_rest  # python_scripts/ queda en sys.path al importar job_queue
+from response_cache import ResponseCache, ANON, jwt_subject
+from hotels_query import build_hotels_query, next_cursor
+from file_cache import CachedJSONFile
+from events_query import filter_events
+from bulk_upsert import BULK_MAX_ROWS, bulk_upsert, summary as bulk_summary
+from metrics import REGISTRY, HTTP_LATENCY
+import destinos
+from price_history import PriceHistory
+from resource_policy import DEFAULT_POLICY as RESOURCE_POLICY
+import threading
+import time
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor'])
+
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def _observe_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # La plantilla de la ruta (no la URL) mantiene acotadas las series
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_LATENCY.observe(time.perf_counter() - start, route=route, method=request.method, status=response.status_code)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Métricas en formato de texto de Prometheus"""
+    return app.response_class(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 # Supabase configuration (server-side only)
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -24,127 +52,338 @@ SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")  # Debe ser la service key
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise ValueError("Faltan variables SUPABASE_URL o SUPABASE_SERVICE_KEY")
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Caché de GET /api/hotels y /api/events por usuario. RESPONSE_CACHE_SHM (nombre de un
+# bloque de memoria compartida) propaga las invalidaciones entre workers de gunicorn
+RESPONSE_CACHE = ResponseCache(
+    ttl=float(os.getenv('RESPONSE_CACHE_TTL', '30')),
+    max_entries=int(os.getenv('RESPONSE_CACHE_MAX', '512')),
+    shm_name=os.getenv('RESPONSE_CACHE_SHM')
+)
+
+def _invalidate_user_cache(*users):
+    """Invalida la caché de los usuarios dados y la de las consultas anónimas"""
+    for user in set(users) | {ANON}:
+        RESPONSE_CACHE.invalidate(user)
+
+def _on_job_finish(job):
+    # Un scraping escribe en Supabase aunque termine con error (sube lo que alcanzó)
+    _invalidate_user_cache(job.params.get('user_id'))
+
+# Pool acotado para los jobs de scraping (cada uno lanza un Chrome).
+# SCRAPE_WORKER_MODE=warm ejecuta los scrapers en procesos con los módulos precargados
+JOBS = JobQueue(
+    max_workers=int(os.getenv('SCRAPE_JOB_WORKERS', '2')),
+    worker_mode=os.getenv('SCRAPE_WORKER_MODE', 'warm'),
+    on_finish=_on_job_finish
+)
+# Los endpoints que esperan al job (geo, hotel propio) van en su propio pool para
+# no quedar detrás de los crawls largos de scrape-hotels
+INTERACTIVE_JOBS = JobQueue(
+    max_workers=int(os.getenv('SCRAPE_INTERACTIVE_WORKERS', '2')),
+    worker_mode=os.getenv('SCRAPE_WORKER_MODE', 'warm'),
+    on_finish=_on_job_finish
+)
+
+def find_job(job_id):
+    """Busca el job en las dos colas"""
+    return JOBS.get(job_id) or INTERACTIVE_JOBS.get(job_id)
+
+# Con el secreto JWT del proyecto se verifica la firma antes de confiar en el sub
+SUPABASE_JWT_SECRET = os.getenv('SUPABASE_JWT_SECRET')
+
+def caller_subject(token):
+    """``sub`` del JWT de quien llama; un token con firma inválida cuenta como anónimo"""
+    if token and SUPABASE_JWT_SECRET:
+        import jwt as pyjwt
+        try:
+            claims = pyjwt.decode(token, SUPABASE_JWT_SECRET, algorithms=['HS256'], audience='authenticated')
+        except pyjwt.PyJWTError:
+            return ANON
+        return claims.get('sub') or ANON
+    return jwt_subject(token)
+
+def find_job_for(job_id, token):
+    """El job solo si el ``sub`` del JWT es su dueño (params['user_id']); si no, None como si no existiera"""
+    job = find_job(job_id)
+    if job is None or caller_subject(token) != (job.params.get('user_id') or ANON):
+        return None
+    return job
+
+def request_jwt():
+    # EventSource no puede mandar cabeceras: el stream SSE acepta el token en ?access_token=
+    return request.headers.get('x-user-jwt') or request.args.get('access_token')
+
+DEFAULT_LIST_PARAMS = {'select': '*', 'order': 'created_at.desc'}
+
+def cache_response(user_jwt, cache_key, content, limit=None):
+    """Guarda en RESPONSE_CACHE una respuesta 200 de Supabase; devuelve (cuerpo, cabeceras)"""
+    headers = {}
+    if limit is not None:
+        cursor = next_cursor(json.loads(content), limit)
+        if cursor:
+            headers['X-Next-Cursor'] = cursor
+    cached = (content, headers)
+    RESPONSE_CACHE.set(user_jwt, cache_key, cached)
+    return cached
+
+def _cached_get(table, params=None, limit=None):
+    """GET a la tabla con la consulta de la petición actual, servido desde RESPONSE_CACHE si se puede.
+
+    Con ``limit`` (paginación de /api/hotels) agrega la cabecera X-Next-Cursor.
+    """
+    user_jwt = request.headers.get('x-user-jwt')
+    cache_key = (table, request.query_string)
+    cached = RESPONSE_CACHE.get(user_jwt, cache_key)
+    if cached is None:
+        response = supabase_rest.get(table, jwt=user_jwt, params=params or DEFAULT_LIST_PARAMS)
+        if response.status_code != 200:
+            return jsonify({'error': f'Supabase error: {response.status_code}', 'details': response.text}), response.status_code
+        cached = cache_response(user_jwt, cache_key, response.content, limit)
+    body, headers = cached
+    return app.response_class(body, mimetype='application/json', headers=headers)
+
+def job_output(job):
+    """Cuerpo y código de la respuesta síncrona de un job ya terminado (como antes de la cola de jobs)"""
+    output = '\n'.join(job.log)
+    if job.state == 'done':
+        return {'output': output, 'job_id': job.id}, 200
+    return {'error': job.error, 'details': output, 'job_id': job.id}, 500
+
+def _job_output_response(job):
+    """Espera al job bloqueando este hilo y responde con su salida"""
+    job.wait()
+    body, status = job_output(job)
+    return jsonify(body), status
 
 @app.route('/run-scrape-hotels', methods=['POST'])
 def run_scrape_hotels():
-    print("Petición recibida en /run-scrape-hotels")
-    data = request.get_json()
-    print("Después de get_json")
+    """Encola el scraping de hoteles y responde de inmediato con el id del job"""
+    data = request.get_json(silent=True)
     user_id = data.get('user_id') if data else None
-    print("Después de obtener user_id:", user_id)
     if not user_id:
         return jsonify({'error': 'user_id requerido'}), 400
+    env = os.environ.copy()
+    user_jwt = request.headers.get('x-user-jwt')
+    if user_jwt:
+        env['USER_JWT'] = user_jwt
+    args = ['python', 'python_scripts/scrape_hotels.py', user_id]
+    call = {'user_id': user_id, 'user_jwt': user_jwt}
+    # Fetcher opcional por corrida: browser | http (ver python_scripts/booking_fetch.py)
+    fetcher = data.get('fetcher')
+    if fetcher:
+        if fetcher not in ('browser', 'http'):
+            return jsonify({'error': 'fetcher debe ser browser o http'}), 400
+        args += ['--fetcher', fetcher]
+        call['fetcher'] = fetcher
+    job = JOBS.submit(
+        'scrape-hotels',
+        args,
+        params={'user_id': user_id, 'fetcher': fetcher},
+        env=env,
+        call=call
+    )
+    print(f"Job {job.id} encolado para user_id {user_id}")
+    return jsonify({'job_id': job.id, 'state': job.state, 'status_url': f'/jobs/{job.id}'}), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Estado, progreso y resultado de un job de scraping (solo para su dueño)"""
+    job = find_job_for(job_id, request_jwt())
+    if job is None:
+        return jsonify({'error': 'job no encontrado'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-Sent Events con el progreso del job (date_scraped, rows_uploaded, forecast_done, state...).
+
+    Reanuda desde la cabecera Last-Event-ID si el navegador se reconecta; termina al acabar el job.
+    Solo para el dueño del job (JWT en x-user-jwt o ?access_token=).
+    """
+    job = find_job_for(job_id, request_jwt())
+    if job is None:
+        return jsonify({'error': 'job no encontrado'}), 404
     try:
-        # Ejecuta el script y pasa el user_id como argumento
-        print("try")
-        result = subprocess.run(
-           
-            ['python', 'python_scripts/scrape_hotels.py', user_id],
-            capture_output=True, text=True, check=True,
-            encoding='utf-8', errors='replace'
-        )
-        print("Antes de iniciar scraping")
-        print("Después de scraping")
-        return jsonify({'output': result.stdout})
-    except subprocess.CalledProcessError as e:
-        print("Error ejecutando el script:", e.stderr)
-        return jsonify({'error': 'Error ejecutando el script', 'details': e.stderr}), 500
+        last_seq = int(request.headers.get('Last-Event-ID') or request.args.get('after', 0))
+    except ValueError:
+        last_seq = 0
+
+    def stream():
+        seq = last_seq
+        while True:
+            finished = job.finished
+            events = job.events_after(seq, timeout=15)
+            for seq, event in events:
+                yield f"id: {seq}\nevent: {event.get('event', 'message')}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+            if not events:
+                if finished:
+                    break
+                yield ': keep-alive\n\n'
+
+    return app.response_class(stream(), mimetype='text/event-stream',
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/workers/stats', methods=['GET'])
+def workers_stats():
+    """Estadísticas del pool de workers calientes; ?measure=1 mide también el arranque por subproceso"""
+    if JOBS.worker_mode != 'warm':
+        return jsonify({'worker_mode': JOBS.worker_mode})
+    pool = JOBS.warm_pool
+    if request.args.get('measure'):
+        pool.measure_subprocess_startup()
+    return jsonify({'worker_mode': JOBS.worker_mode, **pool.stats()})
+
+def submit_eventos_job(data, user_jwt):
+    """Encola el pipeline de eventos (Ticketmaster + Songkick) para el hotel indicado"""
+    hotel_name = data.get('hotel_name', 'Grand Hotel Tijuana')
+    radius = str(data.get('radius', 10))
+
+    args = [
+        'python', 'python_scripts/scrape_eventos.py',
+        hotel_name, str(radius)
+    ]
+
+    print("Args to subprocess:", args)
+    env = os.environ.copy()
+    if user_jwt:
+        env['USER_JWT'] = user_jwt
+    return INTERACTIVE_JOBS.submit(
+        'scrape-eventos', args,
+        params={'hotel_name': hotel_name, 'radius': radius, 'user_id': jwt_subject(user_jwt)},
+        env=env,
+        call={'hotel_name': hotel_name, 'radius': radius, 'user_jwt': user_jwt}
+    )
 
 @app.route('/run-scrapeo-geo', methods=['POST'])
 def run_scrapeo_geo():
-    try:
-        data = request.get_json()
-        hotel_name = data.get('hotel_name', 'Grand Hotel Tijuana')
-        radius = str(data.get('radius', 10))
+    job = submit_eventos_job(request.get_json(silent=True) or {}, request.headers.get('x-user-jwt'))
+    return _job_output_response(job)
 
-        args = [
-            'python', 'python_scripts/scrape_eventos.py',
-            hotel_name, str(radius)
-        ]
+HOTELES_TIJUANA_JSON = CachedJSONFile(os.path.join('resultados', 'hoteles_tijuana_promedios.json'))
 
-        print("Args to subprocess:", args)
-        user_jwt = request.headers.get('x-user-jwt')
-        env = os.environ.copy()
-        if user_jwt:
-            env['USER_JWT'] = user_jwt
-        result = subprocess.run(
-            args,
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding='utf-8',
-            errors='replace',
-            env=env
-        )
-        print("STDOUT:", result.stdout)
-        print("STDERR:", result.stderr)
-
-        return jsonify({'output': result.stdout}), 200
-    except subprocess.CalledProcessError as e:
-        print("STDOUT:", e.stdout)
-        print("STDERR:", e.stderr)
-        return jsonify({'error': e.stderr}), 500
+def _serve_json_snapshot(snapshot):
+    """Respuesta con ETag/Last-Modified, 304 condicional y la variante comprimida que acepte el cliente"""
+    if request.if_none_match.contains(snapshot.etag) or (
+            not request.if_none_match and request.if_modified_since is not None
+            and int(snapshot.mtime) <= request.if_modified_since.timestamp()):
+        response = app.response_class(status=304)
+    else:
+        body, encoding = snapshot.variant(request.accept_encodings)
+        response = app.response_class(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.headers['ETag'] = f'"{snapshot.etag}"'
+    response.headers['Last-Modified'] = snapshot.last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 @app.route('/hoteles-tijuana-json', methods=['GET'])
 def hoteles_tijuana_json():
-    filename = os.path.join('resultados', 'hoteles_tijuana_promedios.json')
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = f.read()
-        return app.response_class(data, mimetype='application/json')
+        snapshot = HOTELES_TIJUANA_JSON.load()
+        if snapshot is None:
+            return {'error': f'No existe {HOTELES_TIJUANA_JSON.path}'}, 500
+        return _serve_json_snapshot(snapshot)
     except Exception as e:
         return {'error': str(e)}, 500
 
+# Un CachedJSONFile por ciudad de destinos.json, creado al primer pedido
+HOTELES_POR_CIUDAD_JSON = {}
+
+@app.route('/hoteles-json/<ciudad>', methods=['GET'])
+def hoteles_ciudad_json(ciudad):
+    """Resultados de scrape_hotels para una ciudad configurada en destinos.json"""
+    try:
+        configuradas = {destinos.slug(d['ciudad']): d['ciudad'] for d in destinos.cargar_destinos()}
+        nombre = configuradas.get(destinos.slug(ciudad))
+        if nombre is None:
+            return {'error': f'{ciudad} no está en destinos.json'}, 404
+        cached = HOTELES_POR_CIUDAD_JSON.setdefault(nombre, CachedJSONFile(destinos.archivo_resultados(nombre)))
+        snapshot = cached.load()
+        if snapshot is None:
+            return {'error': f'No existe {cached.path}'}, 404
+        return _serve_json_snapshot(snapshot)
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+_PRICE_HISTORY = None
+_PRICE_HISTORY_LOCK = threading.Lock()
+
+def _price_history():
+    """Store compartido por las peticiones; se abre una sola vez"""
+    global _PRICE_HISTORY
+    with _PRICE_HISTORY_LOCK:
+        if _PRICE_HISTORY is None:
+            _PRICE_HISTORY = PriceHistory()
+        return _PRICE_HISTORY
+
+@app.route('/api/price-history', methods=['GET'])
+def get_price_history():
+    """Historial local de precios (ver python_scripts/price_history.py).
+
+    nombre= y fecha= devuelven cada observación de esa noche a lo largo de las
+    corridas; solo nombre= (con from=/to= opcionales) devuelve la serie real más reciente.
+    """
+    nombre = request.args.get('nombre')
+    if not nombre:
+        return jsonify({'error': 'nombre es obligatorio'}), 400
+    try:
+        historial = _price_history()
+        fecha = request.args.get('fecha')
+        if fecha:
+            observaciones = historial.precio_en_el_tiempo(nombre, fecha, request.args.get('tipo'))
+            return jsonify([{'scrape_ts': ts, 'visto': visto, 'precio': precio, 'tipo': tipo}
+                            for ts, visto, precio, tipo in observaciones])
+        return jsonify(historial.serie_real(nombre, request.args.get('from'), request.args.get('to')))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/events', methods=['GET'])
 def get_events():
     """Fetch events from Supabase, RLS will filter by user automatically"""
     if not SUPABASE_URL or not SUPABASE_KEY:
         return jsonify({'error': 'Supabase configuration missing'}), 500
 
-    user_jwt = request.headers.get('x-user-jwt')
-    headers = {
-        'apikey': SUPABASE_KEY,
-        'Authorization': f'Bearer {user_jwt if user_jwt else SUPABASE_KEY}'
-    }
     try:
-        response = requests.get(
-            f'{SUPABASE_URL}/rest/v1/events?select=*&order=created_at.desc',
-            headers=headers
-        )
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            return jsonify({'error': f'Supabase error: {response.status_code}', 'details': response.text}), response.status_code
+        return _cached_get('events')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/hotels', methods=['GET'])
 def get_hotels():
-    """Fetch hotels from Supabase, RLS will filter by user automatically"""
+    """Fetch hotels from Supabase, RLS will filter by user automatically.
+
+    Acepta fields=, nombre=, from=/to=, tipo= y limit=/after= (ver hotels_query).
+    """
     if not SUPABASE_URL or not SUPABASE_KEY:
         return jsonify({'error': 'Supabase configuration missing'}), 500
 
-    user_jwt = request.headers.get('x-user-jwt')
-    headers = {
-        'apikey': SUPABASE_KEY,
-        'Authorization': f'Bearer {user_jwt if user_jwt else SUPABASE_KEY}'
-    }
     try:
-        response = requests.get(
-            f'{SUPABASE_URL}/rest/v1/hotels?select=*&order=created_at.desc',
-            headers=headers
-        )
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            return jsonify({'error': f'Supabase error: {response.status_code}', 'details': response.text}), response.status_code
+        params, limit = build_hotels_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        return _cached_get('hotels', params, limit)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _bulk_response(table, rows):
+    """Upsert masivo de un arreglo JSON con resultado por fila (ver bulk_upsert)"""
+    if len(rows) > BULK_MAX_ROWS:
+        return jsonify({'error': f'máximo {BULK_MAX_ROWS} filas por petición (llegaron {len(rows)})'}), 413
+    user_jwt = request.headers.get('x-user-jwt')
+    results, users = bulk_upsert(table, rows, jwt=user_jwt)
+    if users:
+        _invalidate_user_cache(*users, jwt_subject(user_jwt))
+    body, status = bulk_summary(results)
+    return jsonify(body), status
+
 @app.route('/api/hotels', methods=['POST'])
 def create_hotel():
     data = request.get_json()
+    if isinstance(data, list):
+        return _bulk_response('hotels', data)
     user_id = data.get('user_id')
     if not user_id:
         return jsonify({'error': 'user_id requerido'}), 400
@@ -156,13 +395,9 @@ def create_hotel():
     # Obtener JWT del header o del body
     user_jwt = request.headers.get('x-user-jwt') or data.get('jwt')
     # Guardar en Supabase
-    response = requests.post(
-        f'{SUPABASE_URL}/rest/v1/hotels',
-        headers={
-            'apikey': SUPABASE_KEY,
-            'Authorization': f'Bearer {user_jwt if user_jwt else SUPABASE_KEY}',
-            'Content-Type': 'application/json'
-        },
+    response = supabase_rest.post(
+        'hotels',
+        jwt=user_jwt,
         json={
             'nombre': nombre,
             'estrellas': estrellas,
@@ -173,11 +408,15 @@ def create_hotel():
 
         }
     )
+    if response.ok:
+        _invalidate_user_cache(user_id, jwt_subject(user_jwt))
     return jsonify(response.json()), response.status_code
 
 @app.route('/api/events', methods=['POST'])
 def create_event():
     data = request.get_json()
+    if isinstance(data, list):
+        return _bulk_response('events', data)
     user_id = data.get('user_id')
     if not user_id:
         return jsonify({'error': 'user_id requerido'}), 400
@@ -186,14 +425,12 @@ def create_event():
     fecha = data.get('fecha')
     lugar = data.get('lugar')
     # ...agrega los campos que uses...
+    # Mismo JWT que el alta de hoteles y las altas masivas, para que RLS aplique igual
+    user_jwt = request.headers.get('x-user-jwt') or data.get('jwt')
     # Guardar en Supabase
-    response = requests.post(
-        f'{SUPABASE_URL}/rest/v1/events',
-        headers={
-            'apikey': SUPABASE_KEY,
-            'Authorization': f'Bearer {SUPABASE_KEY}',
-            'Content-Type': 'application/json'
-        },
+    response = supabase_rest.post(
+        'events',
+        jwt=user_jwt,
         json={
             'nombre': nombre,
             'fecha': fecha,
@@ -202,6 +439,8 @@ def create_event():
             # ...agrega los campos que uses...
         }
     )
+    if response.ok:
+        _invalidate_user_cache(user_id, jwt_subject(user_jwt))
     return jsonify(response.json()), response.status_code
 
 @app.route('/api/health', methods=['GET'])
@@ -212,21 +451,24 @@ def health_check():
         'supabase_configured': bool(SUPABASE_URL and SUPABASE_KEY)
     })
 
+EVENTOS_CERCANOS_JSON = CachedJSONFile(os.path.join('resultados', 'eventos_cercanos.json'), precompress=False)
+
 @app.route('/api/events-local', methods=['GET'])
 def get_events_local():
-    """Fetch events from local eventos_cercanos.json (MX + US juntos)"""
+    """Fetch events from local eventos_cercanos.json (MX + US juntos).
+
+    Filtra por from=/to=, source=, q=, max_km= y ordena por distancia a hotel= (ver events_query).
+    """
     try:
-        filename = os.path.join('resultados', 'eventos_cercanos.json')
-        if not os.path.exists(filename):
-            return jsonify({'mx': [], 'us': []})
-        with open(filename, 'r', encoding='utf-8') as f:
-            try:
-                data = json.load(f)
-            except Exception:
-                data = {}
-        mx = data.get('mx', [])
-        us = data.get('us', [])
-        return jsonify({'mx': mx, 'us': us})
+        try:
+            snapshot = EVENTOS_CERCANOS_JSON.load()
+        except ValueError:
+            snapshot = None
+        data = snapshot.data if snapshot is not None and isinstance(snapshot.data, dict) else {}
+        try:
+            return jsonify(filter_events(data, request.args))
+        except ValueError as e:
+            return jsonify({'mx': [], 'us': [], 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'mx': [], 'us': [], 'error': str(e)}), 500
 
@@ -234,6 +476,7 @@ async def scrape_booking_prices(hotel_name: str, locale="en-us", currency="USD")
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=False)
         page = await browser.new_page()
+        await RESOURCE_POLICY.install_playwright(page.context)
         today = datetime.today()
         tomorrow = today + timedelta(days=1)
         checkin = today.strftime("%Y-%m-%d")
@@ -383,56 +626,48 @@ async def insert_user_hotel_prices(user_id: str, hotel_name: str, results: list)
     for day in results:
         checkin_date = day["date"]
         for room in day["rooms"]:
-            r = supabase.table("hotel_usuario").insert({
+            r = supabase_rest.post("hotel_usuario", json={
                 "user_id": user_id,
                 "hotel_name": hotel_name,
                 "scrape_date": datetime.today().strftime("%Y-%m-%d"),
                 "checkin_date": checkin_date,
                 "room_type": room["room_type"],
                 "price": room["price"]
-            }).execute()
-            print("Insert response:", r)
+            })
+            print("Insert response:", r.status_code, r.text)
 
 async def main_scrape(user_id: str, hotel_name: str):
     prices = await scrape_booking_prices(hotel_name)
+    RESOURCE_POLICY.publicar("backend_propio")
     print("Precios:", prices)
     await insert_user_hotel_prices(user_id, hotel_name, prices)
     print("¡Listo!")
 
+def submit_propio_job(data):
+    """Encola el scraping del hotel propio; None si faltan user_id o hotel_name"""
+    user_id = data.get('user_id')
+    hotel_name = data.get('hotel_name')
+    jwt = data.get('jwt', '')  # <-- Nuevo: lee el JWT del body
+    if not user_id or not hotel_name:
+        return None
+    args = [
+        'python', 'python_scripts/hotel_propio.py',
+        user_id, hotel_name
+    ]
+    if jwt:
+        args += ['--jwt', jwt]  # <-- Nuevo: agrega el JWT si existe
+    return INTERACTIVE_JOBS.submit(
+        'scrape-hotel-propio', args,
+        params={'user_id': user_id, 'hotel_name': hotel_name},
+        call={'user_id': user_id, 'hotel_name': hotel_name, 'jwt': jwt}
+    )
+
 @app.route('/run-scrape-hotel-propio', methods=['POST'])
 def run_scrape_hotel_propio():
-    try:
-        data = request.get_json()
-        user_id = data.get('user_id')
-        hotel_name = data.get('hotel_name')
-        jwt = data.get('jwt', '')  # <-- Nuevo: lee el JWT del body
-        if not user_id or not hotel_name:
-            return {'status': 'error', 'message': 'user_id y hotel_name requeridos'}, 400
-        args = [
-            'python', 'python_scripts/hotel_propio.py',
-            user_id, hotel_name
-        ]
-        if jwt:
-            args += ['--jwt', jwt]  # <-- Nuevo: agrega el JWT si existe
-        print('Args to subprocess:', args)
-        result = subprocess.run(
-            args,
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding='utf-8',
-            errors='replace'
-        )
-        print('STDOUT:', result.stdout)
-        print('STDERR:', result.stderr)
-        return jsonify({'output': result.stdout}), 200
-    except subprocess.CalledProcessError as e:
-        print('STDOUT:', e.stdout)
-        print('STDERR:', e.stderr)
-        return jsonify({'error': e.stderr}), 500
-    except Exception as ex:
-        print('General Exception:', ex)
-        return jsonify({'error': str(ex)}), 500
+    job = submit_propio_job(request.get_json(silent=True) or {})
+    if job is None:
+        return {'status': 'error', 'message': 'user_id y hotel_name requeridos'}, 400
+    return _job_output_response(job)
 
 if __name__ == '__main__':
     app.run(port=5000) 
\ No newline at end of file
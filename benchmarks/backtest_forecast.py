@@ -0,0 +1,109 @@
+"""Backtest de los motores de ``forecast`` sobre el historial guardado.
+
+Toma los precios ``tipo: real`` de ``resultados/hoteles_*_promedios.json``,
+aparta los últimos ``--holdout`` días de cada hotel, ajusta cada motor con el
+resto y compara el error sobre los días apartados y el tiempo total:
+
+    python benchmarks/backtest_forecast.py --holdout 7
+    python benchmarks/backtest_forecast.py --engines numpy --files resultados/hoteles_ensenada_promedios.json
+    python benchmarks/backtest_forecast.py --history resultados/historial_precios.sqlite
+
+Con ``--history`` lee el último precio real de cada noche del historial local
+(``price_history``) en lugar de los JSON.
+
+La línea ``media`` (promedio del periodo de ajuste) sirve de referencia.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'python_scripts'))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import forecast  # noqa: E402
+import price_history  # noqa: E402
+
+
+def load_history(paths):
+    series = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for hotel in json.load(f):
+                reales = sorted((p for p in hotel.get('precios_por_dia', []) if p.get('tipo') == 'real'),
+                                key=lambda p: p['fecha'])
+                if reales:
+                    series[(os.path.basename(path), hotel['nombre'])] = [
+                        {'fecha': p['fecha'], 'precio': p['precio']} for p in reales]
+    return series
+
+
+def load_history_db(path, ciudad=None):
+    historial = price_history.PriceHistory(path)
+    try:
+        return {(ciudad, nombre): precios for nombre, precios in historial.series_reales(ciudad).items()}
+    finally:
+        historial.close()
+
+
+def split(series, holdout, min_train):
+    train, test = [], []
+    for precios in series.values():
+        if len(precios) < holdout + min_train:
+            continue
+        train.append(precios[:-holdout])
+        test.append(precios[-holdout:])
+    return train, test
+
+
+def errors(predicciones, test):
+    abs_err, pct_err = [], []
+    for pred, reales in zip(predicciones, test):
+        yhat = dict(zip(pred['ds'].dt.strftime('%Y-%m-%d'), pred['yhat']))
+        for p in reales:
+            abs_err.append(abs(yhat[p['fecha']] - p['precio']))
+            pct_err.append(abs_err[-1] / p['precio'])
+    return float(np.mean(abs_err)), float(np.mean(pct_err)) * 100
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', nargs='+', default=None)
+    parser.add_argument('--history', default=None, help='SQLite de price_history en lugar de los JSON')
+    parser.add_argument('--ciudad', default=None, help='con --history, solo esta ciudad')
+    parser.add_argument('--holdout', type=int, default=7)
+    parser.add_argument('--min-train', type=int, default=7)
+    parser.add_argument('--engines', nargs='+', choices=forecast.FORECASTERS, default=list(forecast.FORECASTERS))
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.history:
+        series = load_history_db(args.history, args.ciudad)
+    else:
+        series = load_history(args.files or sorted(glob.glob(os.path.join('resultados', 'hoteles_*_promedios.json'))))
+    train, test = split(series, args.holdout, args.min_train)
+    if not train:
+        sys.exit('No hay hoteles con historial suficiente')
+    periods = max((pd.Timestamp(t[-1]['fecha']) - pd.Timestamp(tr[-1]['fecha'])).days for tr, t in zip(train, test))
+    print(f'{len(train)} hoteles, {args.holdout} días apartados, horizonte {periods} días')
+    print(f'{"motor":<8} {"MAE":>9} {"MAPE %":>8} {"segundos":>9}')
+
+    media = [pd.DataFrame({'ds': pd.to_datetime([p['fecha'] for p in t]),
+                           'yhat': np.mean([p['precio'] for p in tr])}) for tr, t in zip(train, test)]
+    mae, mape = errors(media, test)
+    print(f'{"media":<8} {mae:>9.1f} {mape:>8.1f} {0:>9.2f}')
+
+    for engine in args.engines:
+        start = time.perf_counter()
+        predicciones = forecast.predecir(train, periods, args.workers, engine)
+        elapsed = time.perf_counter() - start
+        mae, mape = errors(predicciones, test)
+        print(f'{engine:<8} {mae:>9.1f} {mape:>8.1f} {elapsed:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Compara el alta registro por registro contra el alta masiva de POST /api/hotels y /api/events.
+
+Requiere el backend corriendo. Escribe filas de prueba con nombre ``bench-...``
+(se pueden borrar luego con ``nombre=like.bench-*``).
+
+    python benchmarks/bench_bulk_insert.py --user-id <uuid> --jwt <token> --rows 500
+"""
+import argparse
+import time
+import uuid
+from datetime import date, timedelta
+
+import requests
+
+
+def make_rows(table, user_id, n, run_id):
+    hoy = date.today()
+    rows = []
+    for i in range(n):
+        fecha = str(hoy + timedelta(days=i % 60))
+        if table == 'hotels':
+            rows.append({'nombre': f'bench-{run_id}-{i // 60}', 'fecha': fecha, 'precio': 1000 + i,
+                         'tipo': 'real', 'estrellas': 3, 'user_id': user_id})
+        else:
+            rows.append({'nombre': f'bench-{run_id}-{i // 60}', 'fecha': fecha, 'lugar': 'Tijuana',
+                         'user_id': user_id})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--backend-url', default='http://localhost:5000')
+    parser.add_argument('--user-id', required=True)
+    parser.add_argument('--jwt', default=None)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--table', choices=['hotels', 'events'], default='hotels')
+    args = parser.parse_args()
+
+    url = f'{args.backend_url}/api/{args.table}'
+    headers = {'x-user-jwt': args.jwt} if args.jwt else {}
+    session = requests.Session()
+
+    rows = make_rows(args.table, args.user_id, args.rows, uuid.uuid4().hex[:8])
+    start = time.perf_counter()
+    for row in rows:
+        session.post(url, json=row, headers=headers)
+    single = time.perf_counter() - start
+
+    rows = make_rows(args.table, args.user_id, args.rows, uuid.uuid4().hex[:8])
+    start = time.perf_counter()
+    response = session.post(url, json=rows, headers=headers)
+    bulk = time.perf_counter() - start
+    body = response.json()
+
+    print(f'{args.rows} filas en /api/{args.table}')
+    print(f'  una por petición: {single:.2f} s ({args.rows / single:.0f} filas/s)')
+    print(f'  arreglo:          {bulk:.2f} s ({args.rows / bulk:.0f} filas/s) '
+          f'ok={body.get("ok")} error={body.get("error")} skipped={body.get("skipped")}')
+    print(f'  aceleración:      x{single / bulk:.1f}')
+
+
+if __name__ == '__main__':
+    main()
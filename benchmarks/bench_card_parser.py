@@ -0,0 +1,69 @@
+"""Compara los backends de ``card_parser`` sobre páginas de resultados guardadas.
+
+Las páginas se graban con ``scrape_hotels.py <user_id> --save-pages DIR``. Sin
+directorio se usa una página sintética con la misma estructura de tarjetas.
+
+    python benchmarks/bench_card_parser.py --pages resultados/paginas --repeat 5
+
+Verifica que todos los backends devuelvan exactamente las mismas tarjetas
+y reporta tarjetas/s de cada uno.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'python_scripts'))
+
+import card_parser  # noqa: E402
+
+CARD = (
+    '<div data-testid="property-card"><div class="c1"><a href="#"><div data-testid="title" class="t">'
+    'Hotel {i} <span>Tijuana</span></div></a>'
+    '<div class="ebc566407a f2" aria-label="{stars} de 5 estrellas"><span></span></div>'
+    '<div><span data-testid="price-and-discounted-price" class="p">MXN\xa0{price:,}</span></div></div></div>'
+)
+
+
+def synthetic_page(cards=25):
+    body = ''.join(CARD.format(i=i, stars=(i % 5) + 1, price=900 + 37 * i) for i in range(cards))
+    return f'<html><head><title>Resultados</title></head><body><div id="r">{body}</div></body></html>'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', default=None, help='Directorio con páginas .html guardadas')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--synthetic-cards', type=int, default=25)
+    args = parser.parse_args()
+
+    if args.pages:
+        paths = sorted(glob.glob(os.path.join(args.pages, '*.html')))
+        pages = [open(p, encoding='utf-8').read() for p in paths]
+        print(f'{len(pages)} páginas de {args.pages}')
+    else:
+        pages = [synthetic_page(args.synthetic_cards)] * 30
+        print(f'30 páginas sintéticas de {args.synthetic_cards} tarjetas')
+    if not pages:
+        sys.exit('No hay páginas .html para medir')
+
+    reference = None
+    for backend in card_parser.available_backends():
+        parse = card_parser.BACKENDS[backend]
+        output = [parse(page) for page in pages]
+        if reference is None:
+            reference = (backend, output)
+        elif output != reference[1]:
+            print(f'  ⚠️ {backend} no coincide con {reference[0]}')
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for page in pages:
+                parse(page)
+        elapsed = time.perf_counter() - start
+        cards = sum(len(o) for o in output) * args.repeat
+        print(f'  {backend:<11} {cards / elapsed:>10.0f} tarjetas/s  {elapsed / (args.repeat * len(pages)) * 1000:.2f} ms/página')
+
+
+if __name__ == '__main__':
+    main()
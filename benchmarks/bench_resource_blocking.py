@@ -0,0 +1,152 @@
+"""Mide con Chrome cuántos bytes y cuánto tiempo ahorra ``resource_policy``.
+
+Carga la misma página con el bloqueo desactivado y activado (Playwright, un
+contexto nuevo por carga, sin caché) y cuenta los bytes que de verdad llegaron
+por la red con CDP (``Network.loadingFinished.encodedDataLength``). La
+diferencia entre ambos modos es lo ahorrado medido; se compara con lo que
+``publicar()`` estima con ``TYPICAL_BYTES``.
+
+Sin ``--url`` sirve en local una página sintética con el peso de una página de
+resultados de Booking (25 fotos de tarjeta, fuentes, un bundle JS y CSS
+permitido, un script de analítica):
+
+    python benchmarks/bench_resource_blocking.py --repeat 5
+    python benchmarks/bench_resource_blocking.py --url "https://www.booking.com/searchresults.html?ss=Tijuana"
+
+``--executable`` usa otro Chrome/Chromium en lugar del de Playwright.
+"""
+import argparse
+import asyncio
+import functools
+import http.server
+import os
+import statistics
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'python_scripts'))
+
+import resource_policy  # noqa: E402
+
+# (ruta, bytes) de los subrecursos de la página sintética; las fotos van aparte
+ASSETS = [
+    ('fonts/bui.woff2', 36_000), ('fonts/bui-bold.woff2', 34_000),
+    ('bstatic.com/psb/capla/app.js', 180_000), ('bstatic.com/psb/capla/app.css', 60_000),
+    ('www.googletagmanager.com/gtm.js', 90_000),
+]
+FOTOS = 25
+
+
+def _bmp(lado):
+    """BMP de 24 bits sin comprimir (~3 * lado² bytes): Chrome lo descarga completo, a diferencia de bytes al azar"""
+    fila = bytes(range(256)) * (lado * 3 // 256 + 1)
+    fila = fila[:lado * 3] + b'\0' * (-lado * 3 % 4)
+    pixeles = fila * lado
+    cabecera = struct.pack('<2sIHHI', b'BM', 54 + len(pixeles), 0, 0, 54)
+    info = struct.pack('<IiiHHIIiiII', 40, lado, lado, 1, 24, 0, len(pixeles), 2835, 2835, 0, 0)
+    return cabecera + info + pixeles
+
+
+def synthetic_site(directory):
+    for ruta, size in ASSETS:
+        path = os.path.join(directory, ruta)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+    os.makedirs(os.path.join(directory, 'img'), exist_ok=True)
+    for i in range(FOTOS):
+        with open(os.path.join(directory, 'img', f'hotel_{i}.bmp'), 'wb') as f:
+            f.write(_bmp(96 + i))
+    cards = ''.join(f'<div data-testid="property-card"><img src="/img/hotel_{i}.bmp" width="200" height="200">'
+                    f'<div data-testid="title">Hotel {i}</div></div>' for i in range(FOTOS))
+    with open(os.path.join(directory, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write('<html><head><link rel="stylesheet" href="/bstatic.com/psb/capla/app.css">'
+                '<style>@font-face{font-family:bui;src:url(/fonts/bui.woff2)}'
+                '@font-face{font-family:bui-b;src:url(/fonts/bui-bold.woff2)}'
+                'body{font-family:bui}b{font-family:bui-b}</style>'
+                '<script src="/bstatic.com/psb/capla/app.js"></script>'
+                '<script async src="/www.googletagmanager.com/gtm.js"></script></head>'
+                f'<body><b>Resultados</b>{cards}</body></html>' + ' ' * 150_000)
+
+
+class _Silencioso(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve(directory):
+    handler = functools.partial(_Silencioso, directory=directory)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/index.html'
+
+
+async def cargar(browser, url, policy):
+    """(bytes recibidos, peticiones bloqueadas, segundos hasta ``load``) de una carga en frío"""
+    context = await browser.new_context()
+    await policy.install_playwright(context)
+    page = await context.new_page()
+    cdp = await context.new_cdp_session(page)
+    await cdp.send('Network.enable')
+    await cdp.send('Network.setCacheDisabled', {'cacheDisabled': True})
+    medidas = {'bytes': 0, 'bloqueadas': 0}
+    cdp.on('Network.loadingFinished', lambda p: medidas.__setitem__('bytes', medidas['bytes'] + p['encodedDataLength']))
+    cdp.on('Network.loadingFailed', lambda p: medidas.__setitem__(
+        'bloqueadas', medidas['bloqueadas'] + ('BLOCKED_BY_CLIENT' in p.get('errorText', ''))))
+    start = time.perf_counter()
+    await page.goto(url, wait_until='load')
+    segundos = time.perf_counter() - start
+    # Los eventos de CDP de las últimas respuestas llegan después de ``load``
+    await page.wait_for_load_state('networkidle')
+    await context.close()
+    return medidas['bytes'], medidas['bloqueadas'], segundos
+
+
+async def medir(url, repeat, executable):
+    from playwright.async_api import async_playwright
+
+    filas = {}
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, executable_path=executable)
+        for modo, enabled in (('sin bloqueo', False), ('con bloqueo', True)):
+            policy = resource_policy.ResourcePolicy(enabled=enabled)
+            cargas = [await cargar(browser, url, policy) for _ in range(repeat)]
+            estimado = policy.publicar('bench')['bytes_ahorrados_estimados'] / repeat
+            filas[modo] = ([c[0] for c in cargas], [c[1] for c in cargas], [c[2] for c in cargas], estimado)
+        await browser.close()
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default=None, help='Página a medir (por defecto, la sintética local)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--executable', default=None, help='Chrome/Chromium a usar en lugar del de Playwright')
+    args = parser.parse_args()
+
+    server = None
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.url
+        if url is None:
+            synthetic_site(directory)
+            server, url = serve(directory)
+        try:
+            filas = asyncio.run(medir(url, args.repeat, args.executable))
+        finally:
+            if server:
+                server.shutdown()
+
+    print(f'{"modo":<12} {"KB/página":>10} {"bloqueadas":>10} {"ms load p50":>11} {"KB estimados":>12}')
+    for modo, (bytes_, bloqueadas, segundos, estimado) in filas.items():
+        print(f'{modo:<12} {statistics.median(bytes_) / 1024:>10.0f} {statistics.median(bloqueadas):>10.0f} '
+              f'{statistics.median(segundos) * 1000:>11.0f} {estimado / 1024:>12.0f}')
+    medido = statistics.median(filas['sin bloqueo'][0]) - statistics.median(filas['con bloqueo'][0])
+    estimado = filas['con bloqueo'][3]
+    print(f'Ahorro medido: {medido / 1024:.0f} KB por página; estimado con TYPICAL_BYTES: {estimado / 1024:.0f} KB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Prueba de carga: usuarios concurrentes del dashboard contra el backend.
+
+Cada usuario virtual repite la carga del dashboard (GET /api/hotels y
+/api/events en paralelo) durante ``--seconds``. Se corre una vez contra Flask
+(hilos) y otra contra el servidor ASGI para comparar cómo escalan:
+
+    python backend_server.py                          # Flask, un hilo por petición
+    uvicorn asgi_server:app --port 5001              # ASGI
+    python benchmarks/load_dashboard.py --url http://localhost:5000 --users 10 50 200
+    python benchmarks/load_dashboard.py --url http://localhost:5001 --users 10 50 200
+
+Con ``--no-cache`` cada petición lleva una query distinta para forzar la ida a
+Supabase (mide el camino de red, no la caché). ``--server-pid`` agrega la CPU
+que gastó el servidor y la del propio generador en cada paso.
+
+El generador es un cliente HTTP/1.1 mínimo sobre ``asyncio`` (dos conexiones
+keep-alive por usuario, como una pestaña del navegador). Con httpx, el
+generador gastaba más CPU que el servidor medido: en una máquina de un núcleo
+eso se le restaba al servidor y los números medían al generador. Aun así, lo
+ideal es correrlo desde otra máquina.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import time
+import uuid
+from urllib.parse import urlsplit
+
+
+def _cpu_seconds(pid=None):
+    if pid is None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+    with open(f'/proc/{pid}/stat') as f:
+        campos = f.read().rsplit(')', 1)[1].split()
+    return (int(campos[11]) + int(campos[12])) / os.sysconf('SC_CLK_TCK')
+
+
+class Connection:
+    """Una conexión keep-alive; se reabre sola si el servidor la cierra"""
+
+    def __init__(self, host, port, headers):
+        self.host, self.port = host, port
+        self.extra = ''.join(f'{k}: {v}\r\n' for k, v in headers.items())
+        self.reader = self.writer = None
+
+    async def get(self, path):
+        """Devuelve el código HTTP de ``GET path``"""
+        for intento in (0, 1):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            self.writer.write(f'GET {path} HTTP/1.1\r\nHost: {self.host}\r\n{self.extra}\r\n'.encode('latin-1'))
+            try:
+                return await self._read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # El servidor cerró una conexión keep-alive ociosa: se reintenta una vez con una nueva
+                self.close()
+                if intento:
+                    raise
+        return None
+
+    async def _read_response(self):
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        version, status = lines[0].split(' ', 2)[:2]
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                k, v = line.split(':', 1)
+                headers[k.strip().lower()] = v.strip().lower()
+        if 'content-length' in headers:
+            await self.reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await self.reader.read()
+            self.close()
+        if headers.get('connection') == 'close' or (version == 'HTTP/1.0' and headers.get('connection') != 'keep-alive'):
+            self.close()
+        return int(status)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def virtual_user(url, headers, deadline, latencies, errors, no_cache):
+    parts = urlsplit(url)
+    conns = [Connection(parts.hostname, parts.port or 80, headers) for _ in range(2)]
+    try:
+        while time.perf_counter() < deadline:
+            suffix = f'?nocache={uuid.uuid4().hex}' if no_cache else ''
+            start = time.perf_counter()
+            try:
+                statuses = await asyncio.gather(
+                    conns[0].get(f'/api/hotels{suffix}'),
+                    conns[1].get(f'/api/events{suffix}'),
+                )
+                if any(s != 200 for s in statuses):
+                    errors.append(1)
+                else:
+                    latencies.append(time.perf_counter() - start)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                errors.append(1)
+                for conn in conns:
+                    conn.close()
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+async def run(url, users, seconds, jwt, no_cache):
+    headers = {'x-user-jwt': jwt} if jwt else {}
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(virtual_user(url, headers, deadline, latencies, errors, no_cache)
+                           for _ in range(users)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--users', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--jwt', default=None)
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--server-pid', type=int, default=None,
+                        help='pid del servidor para reportar su CPU (Linux)')
+    args = parser.parse_args()
+
+    columnas = f'{"usuarios":>8} {"cargas/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"errores":>8}'
+    if args.server_pid:
+        columnas += f' {"cpu srv s":>9} {"cpu gen s":>9}'
+    print(columnas)
+    for users in args.users:
+        if args.server_pid:
+            srv, gen = _cpu_seconds(args.server_pid), _cpu_seconds()
+        latencies, errors = asyncio.run(run(args.url, users, args.seconds, args.jwt, args.no_cache))
+        if latencies:
+            p50 = statistics.median(latencies) * 1000
+            p95 = statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) > 1 else p50
+        else:
+            p50 = p95 = float('nan')
+        fila = f'{users:>8} {len(latencies) / args.seconds:>9.1f} {p50:>8.1f} {p95:>8.1f} {len(errors):>8}'
+        if args.server_pid:
+            fila += f' {_cpu_seconds(args.server_pid) - srv:>9.1f} {_cpu_seconds() - gen:>9.1f}'
+        print(fila)
+
+
+if __name__ == '__main__':
+    main()
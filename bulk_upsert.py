@@ -0,0 +1,119 @@
+"""Altas masivas para ``POST /api/hotels`` y ``POST /api/events`` con un arreglo JSON.
+
+Las filas se validan en una sola pasada, se deduplican por la clave de
+``on_conflict`` (la misma que usan los scrapers) y se envían a PostgREST en
+lotes. El resultado informa el estado de cada fila por su índice en el arreglo
+original.
+
+Cada fila lleva solo las columnas que trae: con ``merge-duplicates`` una
+columna enviada como null borraría el valor guardado. PostgREST exige las
+mismas llaves en todo el lote, así que los lotes se arman por conjunto de
+columnas.
+
+Un arreglo de más de ``BULK_MAX_ROWS`` filas se rechaza entero (413) antes de
+validar nada. Todas las filas van con el JWT de quien llama (o la llave del
+servidor si no trae uno), igual que el alta de un solo registro.
+"""
+import os
+import re
+
+import supabase_rest
+
+CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', '500'))
+BULK_MAX_ROWS = int(os.getenv('BULK_MAX_ROWS', '5000'))
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+# tabla -> (columnas aceptadas, obligatorias, numéricas, on_conflict)
+# (created_by toma el user_id de la fila si no viene, como en el alta de un solo registro)
+SCHEMAS = {
+    'hotels': (
+        ('nombre', 'fecha', 'precio', 'tipo', 'estrellas', 'precio_promedio', 'noches_contadas', 'user_id', 'created_by'),
+        ('nombre', 'fecha', 'user_id'),
+        ('precio', 'estrellas', 'precio_promedio', 'noches_contadas'),
+        'nombre,fecha',
+    ),
+    'events': (
+        ('nombre', 'fecha', 'lugar', 'enlace', 'latitude', 'longitude', 'distance_km', 'hotel_referencia', 'user_id'),
+        ('nombre', 'fecha', 'user_id'),
+        ('latitude', 'longitude', 'distance_km'),
+        'nombre,fecha',
+    ),
+}
+
+
+def _validate_row(row, columns, required, numeric):
+    if not isinstance(row, dict):
+        return None, 'cada elemento debe ser un objeto JSON'
+    missing = [c for c in required if not row.get(c)]
+    if missing:
+        return None, f'faltan campos: {", ".join(missing)}'
+    if not _DATE_RE.match(str(row['fecha'])):
+        return None, 'fecha debe tener formato YYYY-MM-DD'
+    for c in numeric:
+        value = row.get(c)
+        if value is not None and not isinstance(value, (int, float)):
+            try:
+                float(value)
+            except (TypeError, ValueError):
+                return None, f'{c} debe ser numérico'
+    record = {c: row[c] for c in columns if c in row}
+    if 'created_by' in columns and 'created_by' not in record:
+        record['created_by'] = record['user_id']
+    return record, None
+
+
+def bulk_upsert(table, rows, jwt=None, chunk_size=CHUNK_SIZE):
+    """Valida y hace upsert de ``rows`` en lotes; devuelve (resultados por fila, user_ids afectados)"""
+    columns, required, numeric, on_conflict = SCHEMAS[table]
+    conflict_keys = on_conflict.split(',')
+    results = [None] * len(rows)
+    pending = {}  # clave de conflicto -> índice (gana la última aparición, como haría el upsert)
+    clean = {}
+    for i, row in enumerate(rows):
+        record, error = _validate_row(row, columns, required, numeric)
+        if error:
+            results[i] = {'index': i, 'status': 'error', 'error': error}
+            continue
+        key = tuple(record[k] for k in conflict_keys)
+        if key in pending:
+            previous = pending[key]
+            results[previous] = {'index': previous, 'status': 'skipped', 'error': f'duplicado de la fila {i}'}
+        pending[key] = i
+        clean[i] = record
+
+    # PostgREST exige que todas las filas de un lote tengan las mismas llaves
+    grupos = {}
+    for i in sorted(pending.values()):
+        grupos.setdefault(tuple(clean[i]), []).append(i)
+    chunks = [indices[start:start + chunk_size]
+              for indices in grupos.values() for start in range(0, len(indices), chunk_size)]
+    users = set()
+    for chunk in chunks:
+        try:
+            response = supabase_rest.upsert(table, [clean[i] for i in chunk], on_conflict, jwt=jwt,
+                                            prefer='return=minimal')
+            ok = response.status_code in (200, 201, 204)
+            error = None if ok else f'Supabase {response.status_code}: {response.text[:300]}'
+        except Exception as e:
+            ok, error = False, str(e)
+        for i in chunk:
+            if ok:
+                results[i] = {'index': i, 'status': 'ok'}
+                users.add(clean[i]['user_id'])
+            else:
+                results[i] = {'index': i, 'status': 'error', 'error': error}
+    return results, users
+
+
+def summary(results):
+    """Cuerpo y código HTTP de la respuesta: 200 si todo salió bien, 207 parcial, 400 si nada"""
+    counts = {'ok': 0, 'error': 0, 'skipped': 0}
+    for r in results:
+        counts[r['status']] += 1
+    if counts['error'] == 0:
+        status = 200
+    elif counts['ok'] == 0:
+        status = 400
+    else:
+        status = 207
+    return {**counts, 'total': len(results), 'results': results}, status
@@ -90,22 +90,70 @@ export const HotelsTab: React.FC = () => {
       return;
     }
     const user_id = user.id;
+    // El backend solo muestra el job a su dueño: el JWT va al encolar y al consultar
+    const { data: { session } } = await supabase.auth.getSession();
+    const jwt = session?.access_token;
+    const jwtHeaders: Record<string, string> = jwt ? { 'x-user-jwt': jwt } : {};
   
     try {
       setLogs(prev => [...prev, '🚀 Ejecutando scraping de hoteles...']);
       const response = await fetch('https://backend-py-7tos.onrender.com/run-scrape-hotels', {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', ...jwtHeaders },
         body: JSON.stringify({ user_id }),
       });
       const data = await response.json();
       if (response.ok) {
-        setLogs(prev => [
-          ...prev,
-          '✅ Scraping completado correctamente.',
-          data.output || ''
-        ]);
-        await fetchHotels();
+        // El backend encola el scraping: seguimos su progreso por SSE hasta que termine
+        const jobUrl = `https://backend-py-7tos.onrender.com/jobs/${data.job_id}`;
+        await new Promise<void>(resolve => {
+          // EventSource no manda cabeceras: el token va en la query
+          const source = new EventSource(`${jobUrl}/events${jwt ? `?access_token=${encodeURIComponent(jwt)}` : ''}`);
+          let total = 0;
+          let done = 0;
+          source.addEventListener('start', (e) => {
+            total = JSON.parse((e as MessageEvent).data).total;
+          });
+          source.addEventListener('date_scraped', (e) => {
+            const event = JSON.parse((e as MessageEvent).data);
+            done += 1;
+            setLogs(prev => [...prev, `📅 ${event.fecha}: ${event.hoteles} hoteles (${done}/${total || '?'})`]);
+          });
+          source.addEventListener('rows_uploaded', (e) => {
+            const event = JSON.parse((e as MessageEvent).data);
+            setLogs(prev => [...prev, `☁️ Subidas ${event.acumulado}/${event.total_filas} filas`]);
+          });
+          source.addEventListener('forecast_done', (e) => {
+            const event = JSON.parse((e as MessageEvent).data);
+            setLogs(prev => [...prev, `🔮 Predicción lista para ${event.hoteles} hoteles`]);
+          });
+          source.addEventListener('state', (e) => {
+            const state = JSON.parse((e as MessageEvent).data).state;
+            if (state === 'done' || state === 'error') {
+              source.close();
+              resolve();
+            }
+          });
+          source.onerror = () => {
+            // El navegador reintenta solo; si el stream terminó cerramos
+            if (source.readyState === EventSource.CLOSED) resolve();
+          };
+        });
+        const job = await (await fetch(jobUrl, { headers: jwtHeaders })).json();
+        if (job.state === 'done') {
+          setLogs(prev => [
+            ...prev,
+            '✅ Scraping completado correctamente.',
+            (job.log_tail || []).join('\n')
+          ]);
+          await fetchHotels();
+        } else {
+          setLogs(prev => [
+            ...prev,
+            `❌ Error ejecutando el scraping: ${job.error || 'Error desconocido'}`,
+            (job.log_tail || []).join('\n')
+          ]);
+        }
       } else {
         setLogs(prev => [
           ...prev,
@@ -0,0 +1,76 @@
+"""Filtros y orden por distancia para ``GET /api/events-local``.
+
+Parámetros (todos opcionales):
+
+- ``from=YYYY-MM-DD`` / ``to=``  ventana de fechas (inclusive)
+- ``source=mx|us``               solo una de las dos fuentes
+- ``q=<texto>``                  búsqueda en nombre y lugar (sin distinguir mayúsculas)
+- ``hotel=<nombre>``             hotel de referencia (HOTEL_COORDINATES) para la distancia
+- ``max_km=N``                   descarta eventos más lejanos o sin coordenadas
+
+Cada evento sale con ``distance_km`` calculado respecto al hotel y las listas
+se ordenan por distancia (los eventos sin coordenadas al final).
+"""
+import re
+
+from hotel_coordinates import get_hotel_coordinates, distance_km
+
+SOURCES = ('mx', 'us')
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def _event_date(event):
+    return (event.get('fecha') or event.get('date') or '')[:10]
+
+
+def _event_text(event):
+    return ' '.join(str(event.get(k) or '') for k in ('nombre', 'name', 'lugar', 'venue')).lower()
+
+
+def _event_coords(event):
+    try:
+        return float(event['latitude']), float(event['longitude'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def filter_events(data, args):
+    """Devuelve {'mx': [...], 'us': [...]} filtrado y ordenado; lanza ValueError si un parámetro es inválido"""
+    date_from, date_to = args.get('from'), args.get('to')
+    for name, value in (('from', date_from), ('to', date_to)):
+        if value and not _DATE_RE.match(value):
+            raise ValueError(f'{name}= debe tener formato YYYY-MM-DD')
+    source = args.get('source')
+    if source and source not in SOURCES:
+        raise ValueError('source debe ser mx o us')
+    max_km = args.get('max_km')
+    if max_km is not None:
+        try:
+            max_km = float(max_km)
+        except ValueError:
+            raise ValueError('max_km debe ser un número')
+    text = (args.get('q') or '').strip().lower()
+    origin = get_hotel_coordinates(args.get('hotel'))
+
+    result = {}
+    for src in SOURCES:
+        if source and src != source:
+            result[src] = []
+            continue
+        rows = []
+        for event in data.get(src) or []:
+            fecha = _event_date(event)
+            if date_from and fecha < date_from:
+                continue
+            if date_to and fecha > date_to:
+                continue
+            if text and text not in _event_text(event):
+                continue
+            coords = _event_coords(event)
+            distance = round(distance_km(origin, coords), 2) if coords else None
+            if max_km is not None and (distance is None or distance > max_km):
+                continue
+            rows.append({**event, 'distance_km': distance})
+        rows.sort(key=lambda e: (e['distance_km'] is None, e['distance_km'] or 0, _event_date(e)))
+        result[src] = rows
+    return result
@@ -0,0 +1,66 @@
+"""Caché en memoria de los JSON de ``resultados/`` que sirve el backend.
+
+Los archivos solo cambian cuando termina un scraping, pero el dashboard los
+pide en cada carga. ``CachedJSONFile`` los lee y parsea una sola vez por
+versión (clave: mtime + tamaño) y prepara también la versión compacta, sus
+variantes gzip/brotli y un ETag, para que cada petición sea solo un ``stat``.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from werkzeug.http import http_date
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional
+    brotli = None
+
+
+class JSONSnapshot:
+    """Una versión del archivo: datos parseados, cuerpo compacto y variantes comprimidas"""
+
+    def __init__(self, raw: bytes, mtime: float, precompress=True):
+        self.data = json.loads(raw.decode('utf-8'))
+        self.body = json.dumps(self.data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.last_modified = http_date(mtime)
+        self.mtime = mtime
+        self.gzip = gzip.compress(self.body, compresslevel=6) if precompress else None
+        self.br = brotli.compress(self.body) if precompress and brotli is not None else None
+
+    def variant(self, accept_encodings):
+        """(cuerpo, Content-Encoding) según lo que acepte el cliente"""
+        if self.br is not None and accept_encodings.quality('br') > 0:
+            return self.br, 'br'
+        if self.gzip is not None and accept_encodings.quality('gzip') > 0:
+            return self.gzip, 'gzip'
+        return self.body, None
+
+
+class CachedJSONFile:
+    def __init__(self, path, precompress=True):
+        """``precompress=False`` para archivos que se filtran antes de enviarse (no se sirven tal cual)"""
+        self.path = path
+        self.precompress = precompress
+        self._lock = threading.Lock()
+        self._key = None
+        self._snapshot = None
+
+    def load(self):
+        """Snapshot vigente del archivo (None si no existe); relee solo si cambió en disco"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        if key == self._key:
+            return self._snapshot
+        with self._lock:
+            if key != self._key:
+                with open(self.path, 'rb') as f:
+                    raw = f.read()
+                self._snapshot = JSONSnapshot(raw, st.st_mtime, self.precompress)
+                self._key = key
+            return self._snapshot
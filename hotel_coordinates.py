@@ -1,5 +1,6 @@
 # Configuración de coordenadas de hoteles en Tijuana
 # Puedes agregar, modificar o eliminar hoteles según tus necesidades
+import math
 
 HOTEL_COORDINATES = {
     "Grand Hotel Tijuana": (32.5149, -117.0382),
@@ -20,6 +21,13 @@ def get_hotel_coordinates(hotel_name):
     """Obtiene las coordenadas de un hotel específico"""
     return HOTEL_COORDINATES.get(hotel_name, (32.5149, -117.0382))  # Default a Tijuana
 
+def distance_km(origin, destination):
+    """Distancia en km (haversine) entre dos pares (latitud, longitud)"""
+    lat1, lon1 = map(math.radians, origin)
+    lat2, lon2 = map(math.radians, destination)
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
 def get_all_hotels():
     """Obtiene la lista de todos los hoteles disponibles"""
     return list(HOTEL_COORDINATES.keys())
@@ -0,0 +1,108 @@
+"""Traducción de los parámetros de ``GET /api/hotels`` a una consulta PostgREST.
+
+Parámetros admitidos (todos opcionales; sin ninguno se conserva la consulta
+histórica ``select=*&order=created_at.desc``):
+
+- ``fields=nombre,fecha,precio``  proyección de columnas
+- ``nombre=<hotel>``              filtro exacto por hotel
+- ``from=YYYY-MM-DD`` / ``to=``   rango de ``fecha`` (inclusive)
+- ``tipo=real|predicho``
+- ``limit=N`` y ``after=<cursor>`` paginación por keyset sobre (created_at, id)
+
+El cursor de la página siguiente viaja en la cabecera ``X-Next-Cursor`` para
+que el cuerpo siga siendo la misma lista JSON de siempre.
+"""
+import base64
+import json
+import re
+from datetime import datetime
+
+HOTEL_COLUMNS = {
+    'id', 'user_id', 'nombre', 'fecha', 'precio', 'tipo', 'estrellas',
+    'precio_promedio', 'noches_contadas', 'created_at', 'created_by',
+}
+TIPOS = {'real', 'predicho'}
+MAX_LIMIT = 1000
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+# created_at tal como lo devuelve PostgREST; el cursor llega del cliente y se inserta en un filtro or=
+_TIMESTAMP_RE = re.compile(r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}:\d{2})?$')
+
+
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at, row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        if not isinstance(created_at, str) or not _TIMESTAMP_RE.match(created_at):
+            raise ValueError
+        datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        return created_at, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('cursor inválido en after=')
+
+
+def build_hotels_query(args):
+    """Devuelve (params PostgREST como lista de tuplas, limit o None).
+
+    ``args`` es un mapping tipo ``request.args``; lanza ValueError si algo no es válido.
+    """
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError('limit debe ser un entero')
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f'limit debe estar entre 1 y {MAX_LIMIT}')
+
+    fields = args.get('fields')
+    if fields:
+        columns = [c.strip() for c in fields.split(',') if c.strip()]
+        unknown = [c for c in columns if c not in HOTEL_COLUMNS]
+        if unknown:
+            raise ValueError(f'columnas desconocidas en fields=: {", ".join(unknown)}')
+        if limit is not None:
+            # El cursor se arma con estas dos columnas
+            columns += [c for c in ('created_at', 'id') if c not in columns]
+        select = ','.join(columns)
+    else:
+        select = '*'
+
+    params = [('select', select)]
+    if args.get('nombre'):
+        params.append(('nombre', f"eq.{args['nombre']}"))
+    for arg, op in (('from', 'gte'), ('to', 'lte')):
+        value = args.get(arg)
+        if value:
+            if not _DATE_RE.match(value):
+                raise ValueError(f'{arg}= debe tener formato YYYY-MM-DD')
+            params.append(('fecha', f'{op}.{value}'))
+    tipo = args.get('tipo')
+    if tipo:
+        if tipo not in TIPOS:
+            raise ValueError('tipo debe ser real o predicho')
+        params.append(('tipo', f'eq.{tipo}'))
+
+    if limit is None:
+        params.append(('order', 'created_at.desc'))
+        return params, None
+
+    params.append(('order', 'created_at.desc,id.desc'))
+    params.append(('limit', str(limit)))
+    after = args.get('after')
+    if after:
+        created_at, row_id = decode_cursor(after)
+        params.append(('or', f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id}))'))
+    return params, limit
+
+
+def next_cursor(rows, limit):
+    """Cursor de la página siguiente, o None si esta fue la última"""
+    if limit is None or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last['created_at'], last['id'])
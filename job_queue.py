@@ -0,0 +1,228 @@
+"""Cola de jobs en segundo plano para los scrapers.
+
+Los endpoints de scraping ya no bloquean un worker de Flask durante todo el
+crawl: encolan un job, responden con su id y un pool acotado de hilos ejecuta
+el script. El estado se consulta con ``GET /jobs/<id>``.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python_scripts')
+if SCRIPTS_DIR not in sys.path:
+    # Los scripts se importan entre sí como módulos hermanos (from progress import ...)
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from progress import parse as parse_progress  # noqa: E402
+from metrics import REGISTRY, JOB_DURATION  # noqa: E402
+
+# Líneas de log que se conservan por job (solo la cola, nunca el log completo)
+LOG_TAIL = 200
+# Eventos de progreso que se conservan por job para GET /jobs/<id>/events
+EVENTS_TAIL = 500
+
+
+class Job:
+    def __init__(self, kind: str, params: dict, total_steps=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.progress = {'done': 0, 'total': total_steps}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.log = deque(maxlen=LOG_TAIL)
+        self.events = deque(maxlen=EVENTS_TAIL)
+        self._seq = 0
+        self._changed = threading.Condition()
+        self._finished = threading.Event()
+        self.state = 'queued'
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, value):
+        self._state = value
+        self.push_event({'event': 'state', 'state': value})
+
+    @property
+    def finished(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        """Bloquea hasta que el job termine; devuelve False si se agotó el timeout"""
+        return self._finished.wait(timeout)
+
+    def push_event(self, event: dict):
+        with self._changed:
+            self._seq += 1
+            self.events.append((self._seq, event))
+            self._changed.notify_all()
+
+    def mark_finished(self):
+        with self._changed:
+            self._finished.set()
+            self._changed.notify_all()
+
+    def events_after(self, seq: int, timeout=None):
+        """Eventos con número mayor que ``seq``; si no hay y el job sigue vivo espera hasta ``timeout``"""
+        with self._changed:
+            if self._seq <= seq and not self._finished.is_set():
+                self._changed.wait(timeout)
+            return [(n, e) for n, e in self.events if n > seq]
+
+    def handle_line(self, line: str):
+        line = line.rstrip('\n')
+        event = parse_progress(line)
+        if event is None:
+            self.log.append(line)
+            return
+        kind = event.get('event')
+        if kind == 'metric':
+            # Observación reenviada por el script (ver metrics.forward_to_stdout)
+            REGISTRY.record(event.get('name'), event.get('value', 0), event.get('labels') or {})
+            return
+        if kind == 'start' and 'total' in event:
+            self.progress['total'] = event['total']
+        elif kind == 'date_scraped':
+            self.progress['done'] += 1
+        self.progress['last_event'] = event
+        self.push_event(event)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'state': self.state,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'log_tail': list(self.log),
+        }
+
+
+class JobQueue:
+    def __init__(self, max_workers=2, max_jobs=200, worker_mode='subprocess', on_finish=None):
+        """``worker_mode='warm'`` ejecuta los jobs en procesos con los módulos precargados
+        (ver warm_workers); ``'subprocess'`` lanza un intérprete nuevo por job.
+        ``on_finish(job)`` se llama al terminar cada job, con éxito o no."""
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scrape-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_jobs = max_jobs
+        self._max_workers = max_workers
+        self.worker_mode = worker_mode
+        self._warm_pool = None
+        self._on_finish = on_finish
+
+    @property
+    def warm_pool(self):
+        # Se crea al primer uso: los procesos hijos (spawn) reimportan el módulo principal
+        with self._lock:
+            if self._warm_pool is None:
+                from warm_workers import WarmWorkerPool
+                self._warm_pool = WarmWorkerPool(max_workers=self._max_workers)
+            return self._warm_pool
+
+    def submit(self, kind: str, args: list, params: dict, env=None, total_steps=None, call=None) -> Job:
+        """Encola un job y lo devuelve de inmediato.
+
+        ``args``/``env`` describen el subproceso; ``call`` son los argumentos de la
+        misma tarea como llamada en proceso, usados cuando ``worker_mode='warm'``.
+        """
+        job = Job(kind, params, total_steps)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        if self.worker_mode == 'warm' and call is not None:
+            self._executor.submit(self._run_warm, job, call)
+        else:
+            self._executor.submit(self._run, job, args, env)
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _evict(self):
+        # Descarta los jobs terminados más antiguos cuando se supera el límite
+        if len(self._jobs) <= self._max_jobs:
+            return
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self._max_jobs:
+                break
+            if self._jobs[job_id].state in ('done', 'error'):
+                del self._jobs[job_id]
+
+    def _finish(self, job: Job):
+        job.finished_at = time.time()
+        JOB_DURATION.observe(job.finished_at - (job.started_at or job.created_at), kind=job.kind, state=job.state)
+        if self._on_finish is not None:
+            try:
+                self._on_finish(job)
+            except Exception as e:
+                print(f"Error en on_finish del job {job.id}: {e}")
+        if job.error:
+            job.push_event({'event': 'error', 'error': job.error})
+        job.mark_finished()
+
+    def _run(self, job: Job, args: list, env):
+        job.state = 'running'
+        job.started_at = time.time()
+        try:
+            proc = subprocess.Popen(
+                args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                env=env
+            )
+            for line in proc.stdout:
+                job.handle_line(line)
+            returncode = proc.wait()
+            if returncode == 0:
+                job.state = 'done'
+                job.result = {'returncode': returncode}
+            else:
+                job.state = 'error'
+                job.error = f'El script terminó con código {returncode}'
+        except Exception as e:
+            job.state = 'error'
+            job.error = str(e)
+        finally:
+            self._finish(job)
+            print(f"Job {job.id} ({job.kind}) terminó en estado {job.state}")
+
+    def _run_warm(self, job: Job, call: dict):
+        job.state = 'running'
+        job.started_at = time.time()
+        try:
+            outcome = self.warm_pool.run(job.id, job.kind, call, job.handle_line)
+            job.state = 'done'
+            job.result = {
+                'value': outcome['value'],
+                'worker_pid': outcome['pid'],
+                'dispatch_seconds': round(outcome['dispatch_seconds'], 4),
+                'run_seconds': round(outcome['run_seconds'], 2),
+            }
+        except Exception as e:
+            job.state = 'error'
+            job.error = str(e)
+        finally:
+            self._finish(job)
+            print(f"Job {job.id} ({job.kind}) terminó en estado {job.state} (worker caliente)")
@@ -0,0 +1,69 @@
+"""Lectura y escritura de los JSON de estado en ``resultados/`` entre procesos.
+
+Varias corridas (el scheduler, un job del backend, un worker tibio) pueden
+escribir el mismo archivo a la vez. ``guardar`` escribe a un temporal único
+(``tempfile.mkstemp`` en el mismo directorio) y lo renombra encima con
+``os.replace``, así que nadie lee un archivo a medias ni dos escritores pisan
+el mismo temporal. Con ``fusionar`` además toma un ``flock`` sobre
+``<archivo>.lock``, vuelve a leer lo que hay en disco y guarda
+``fusionar(en_disco, datos)``: lo que otro proceso escribió mientras tanto no
+se pierde. Sin ``fcntl`` (Windows) se escribe sin candado.
+"""
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def leer(path, default=None):
+    """Contenido de ``path``; ``default`` si no existe o no es JSON válido"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+@contextmanager
+def _candado(path):
+    if fcntl is None:
+        yield
+        return
+    with open(path + '.lock', 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _reemplazar(path, data):
+    directory = os.path.dirname(path) or '.'
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def guardar(path, data, fusionar=None):
+    """Escribe ``data`` en ``path`` de forma atómica; devuelve lo que quedó guardado"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if fusionar is None:
+        _reemplazar(path, data)
+        return data
+    with _candado(path):
+        data = fusionar(leer(path), data)
+        _reemplazar(path, data)
+    return data
@@ -0,0 +1,348 @@
+"""Descarga concurrente de páginas de resultados de Booking.
+
+``BrowserPool`` mantiene hasta N sesiones de Chrome que se reutilizan entre
+fechas y ``RateLimiter`` espacia las navegaciones de todas ellas, así que
+subir N acorta la corrida sin multiplicar la tasa de peticiones por encima del
+límite configurado. ``PageCrawler`` reparte las URLs entre los navegadores y
+devuelve los resultados conforme terminan (se le pueden encolar más páginas
+mientras tanto, p. ej. la siguiente tanda de ``offset=``); quien llama se
+encarga de ordenarlos (los hilos solo descargan, no imprimen).
+
+    SCRAPE_BROWSERS       navegadores en paralelo (por defecto 3)
+    SCRAPE_MIN_INTERVAL   segundos mínimos entre navegaciones (por defecto 1.0)
+    SCRAPE_HEADLESS       0 para ver las ventanas (por defecto headless)
+    SCRAPE_FETCHER        browser | http | fixtures (por defecto browser)
+
+Con ``http`` las páginas se piden con una ``requests.Session`` compartida
+(pool de conexiones y cookies persistentes) y solo se abre Chrome para las
+fechas cuya respuesta no trae tarjetas (reto anti-bot, página vacía). Con
+``fixtures`` se leen páginas guardadas (``page_name``) desde un
+directorio, para probar el parseo sin red; ``save_dir`` guarda las páginas
+descargadas con ese mismo formato.
+
+Los navegadores no descargan imágenes, fuentes ni rastreadores: ver
+``resource_policy`` (``RESOURCE_BLOCKING=0`` lo desactiva).
+"""
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.wait import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from destinos import slug
+from resource_policy import DEFAULT_POLICY
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36")
+CARD_SELECTOR = "div[data-testid='property-card']"
+CARD_MARKER = 'data-testid="property-card"'
+FETCHERS = ('browser', 'http', 'fixtures')
+
+DEFAULT_BROWSERS = int(os.getenv('SCRAPE_BROWSERS', '3'))
+DEFAULT_MIN_INTERVAL = float(os.getenv('SCRAPE_MIN_INTERVAL', '1.0'))
+HEADLESS = os.getenv('SCRAPE_HEADLESS', '1') != '0'
+DEFAULT_FETCHER = os.getenv('SCRAPE_FETCHER', 'browser')
+# Archivo opcional donde guardar las cookies de Booking entre corridas
+COOKIES_FILE = os.getenv('BOOKING_COOKIES_FILE')
+
+
+class MissingCards(Exception):
+    """La respuesta llegó pero no trae tarjetas de propiedades"""
+
+
+class RateLimiter:
+    """Límite global compartido entre hilos: una navegación cada ``min_interval`` segundos"""
+
+    def __init__(self, min_interval=DEFAULT_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def chrome_options(headless=HEADLESS, policy=DEFAULT_POLICY):
+    options = policy.chrome_options(Options())
+    options.add_argument(f"user-agent={USER_AGENT}")
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1366,900")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    return options
+
+
+class BrowserPool:
+    """Hasta ``size`` sesiones de Chrome, creadas bajo demanda y reutilizadas"""
+
+    def __init__(self, size=DEFAULT_BROWSERS, headless=HEADLESS, policy=DEFAULT_POLICY):
+        self.size = max(1, size)
+        self.headless = headless
+        self.policy = policy
+        self._idle = queue.Queue()
+        self._drivers = []
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def driver(self):
+        driver = self._acquire()
+        try:
+            yield driver
+        except TimeoutException:
+            # La página no mostró tarjetas; la sesión sigue sirviendo
+            self._idle.put(driver)
+            raise
+        except Exception:
+            # Cualquier otro fallo puede dejar la sesión en mal estado: se reemplaza
+            self._discard(driver)
+            raise
+        else:
+            self._idle.put(driver)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._count < self.size
+            if create:
+                self._count += 1
+        if not create:
+            return self._idle.get()
+        try:
+            driver = webdriver.Chrome(options=chrome_options(self.headless, self.policy))
+        except Exception:
+            with self._lock:
+                self._count -= 1
+            raise
+        with self._lock:
+            self._drivers.append(driver)
+        try:
+            self.policy.install_selenium(driver)
+        except Exception:
+            self._discard(driver)
+            raise
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+                self._count -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            drivers, self._drivers, self._count = self._drivers, [], 0
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+def load_page(driver, url, timeout=20):
+    """Navega a ``url`` y espera a que aparezcan las tarjetas; devuelve el HTML"""
+    driver.get(url)
+    WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.CSS_SELECTOR, CARD_SELECTOR)))
+    return driver.page_source
+
+
+class BrowserFetcher:
+    def __init__(self, browsers=DEFAULT_BROWSERS, headless=HEADLESS):
+        self.name = 'browser'
+        self.pool = BrowserPool(browsers, headless)
+
+    def fetch(self, url):
+        with self.pool.driver() as driver:
+            try:
+                return load_page(driver, url)
+            finally:
+                self.pool.policy.medir_selenium(driver)
+
+    def close(self):
+        self.pool.close()
+
+
+class HttpFetcher:
+    """Pide las páginas sin navegador; lanza ``MissingCards`` si no hay tarjetas"""
+
+    def __init__(self, pool_size=DEFAULT_BROWSERS, timeout=(5, 20), cookies_file=COOKIES_FILE):
+        self.name = 'http'
+        self.timeout = timeout
+        self.cookies_file = cookies_file
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'es-MX,es;q=0.9,en;q=0.8',
+        })
+        if cookies_file and os.path.exists(cookies_file):
+            with open(cookies_file, encoding='utf-8') as f:
+                self.session.cookies.update(json.load(f))
+
+    def fetch(self, url):
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        if CARD_MARKER not in response.text:
+            raise MissingCards(f'{response.status_code} sin tarjetas ({len(response.content)} bytes)')
+        return response.text
+
+    def close(self):
+        if self.cookies_file:
+            with open(self.cookies_file, 'w', encoding='utf-8') as f:
+                json.dump(self.session.cookies.get_dict(), f)
+        self.session.close()
+
+
+class FixtureFetcher:
+    """Lee las páginas guardadas (``page_name``) en lugar de ir a la red"""
+
+    def __init__(self, directory):
+        self.name = 'fixtures'
+        self.directory = Path(directory)
+
+    def fetch(self, url):
+        path = self.directory / page_name(url)
+        if not path.exists():
+            raise FileNotFoundError(f'No hay fixture {path.name} en {self.directory}')
+        html = path.read_text(encoding='utf-8')
+        if CARD_MARKER not in html:
+            raise MissingCards(f'{path.name} sin tarjetas')
+        return html
+
+    def close(self):
+        pass
+
+
+def make_fetcher(kind=DEFAULT_FETCHER, browsers=DEFAULT_BROWSERS, headless=HEADLESS, fixtures_dir=None):
+    if kind == 'browser':
+        return BrowserFetcher(browsers, headless)
+    if kind == 'http':
+        return HttpFetcher(browsers)
+    if kind == 'fixtures':
+        if not fixtures_dir:
+            raise ValueError('El modo fixtures requiere un directorio de páginas guardadas')
+        return FixtureFetcher(fixtures_dir)
+    raise ValueError(f'Fetcher desconocido: {kind} (opciones: {", ".join(FETCHERS)})')
+
+
+def page_name(url):
+    """Nombre de archivo de una página: ``<ciudad>_<checkin>.html`` o ``<ciudad>_<checkin>_<offset>.html``"""
+    query = parse_qs(urlparse(url).query)
+    ciudad = slug(query.get('ss', [''])[0])
+    checkin = query.get('checkin', [''])[0]
+    offset = query.get('offset', ['0'])[0]
+    return f'{ciudad}_{checkin}.html' if offset in ('', '0') else f'{ciudad}_{checkin}_{offset}.html'
+
+
+class PageCrawler:
+    """Descargas en paralelo a las que se pueden agregar URLs mientras se consumen resultados.
+
+    ``submit`` encola una página y ``results`` genera ``(clave, html, error,
+    segundos, origen)`` en orden de finalización hasta que no quede nada
+    pendiente, incluidas las páginas encoladas durante la iteración. En modo
+    ``http`` las páginas sin tarjetas se reintentan con Chrome.
+    """
+
+    def __init__(self, browsers=DEFAULT_BROWSERS, min_interval=DEFAULT_MIN_INTERVAL, headless=HEADLESS,
+                 fetcher=DEFAULT_FETCHER, fixtures_dir=None, save_dir=None):
+        self.workers = max(1, browsers)
+        self.kind = fetcher
+        self.headless = headless
+        self.save_dir = save_dir
+        self.primary = make_fetcher(fetcher, self.workers, headless, fixtures_dir)
+        self.limiter = RateLimiter(0 if fetcher == 'fixtures' else min_interval)
+        self._fallback = None
+        self._fallback_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='booking')
+        self._pending = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _browser_fallback(self):
+        with self._fallback_lock:
+            if self._fallback is None:
+                self._fallback = BrowserFetcher(self.workers, self.headless)
+            return self._fallback
+
+    def _fetch(self, key, url):
+        self.limiter.wait()
+        start = time.perf_counter()
+        origen = self.primary.name
+        try:
+            try:
+                html = self.primary.fetch(url)
+            except (MissingCards, requests.RequestException):
+                if self.kind != 'http':
+                    raise
+                origen = 'browser'
+                self.limiter.wait()
+                html = self._browser_fallback().fetch(url)
+            return key, html, None, time.perf_counter() - start, origen
+        except Exception as e:
+            return key, None, e, time.perf_counter() - start, origen
+
+    def submit(self, key, url):
+        self._pending[self._executor.submit(self._fetch, key, url)] = url
+
+    def results(self):
+        while self._pending:
+            done, _ = wait(list(self._pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                url = self._pending.pop(future)
+                result = future.result()
+                if self.save_dir and result[1] is not None:
+                    os.makedirs(self.save_dir, exist_ok=True)
+                    Path(self.save_dir, page_name(url)).write_text(result[1], encoding='utf-8')
+                yield result
+
+    def close(self):
+        for future in self._pending:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        self.primary.close()
+        if self._fallback is not None:
+            self._fallback.close()
+
+
+def fetch_all(urls, browsers=DEFAULT_BROWSERS, min_interval=DEFAULT_MIN_INTERVAL, headless=HEADLESS,
+              fetcher=DEFAULT_FETCHER, fixtures_dir=None, save_dir=None):
+    """Descarga ``urls`` ({clave: url}); genera los resultados de ``PageCrawler.results``"""
+    with PageCrawler(min(browsers, len(urls)) or 1, min_interval, headless, fetcher,
+                     fixtures_dir, save_dir) as crawler:
+        for key, url in urls.items():
+            crawler.submit(key, url)
+        yield from crawler.results()
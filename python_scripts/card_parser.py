@@ -0,0 +1,129 @@
+"""Extracción de las tarjetas de propiedades de una página de resultados de Booking.
+
+Tres backends con la misma salida (lista de ``{"nombre", "estrellas", "precio"}``
+en el orden de la página):
+
+    bs4         BeautifulSoup + html.parser (el parseo original, puro Python)
+    lxml        lxml.html + XPath
+    selectolax  parser Lexbor en C, el más rápido
+
+lxml y selectolax son opcionales; ``DEFAULT_BACKEND`` es el más rápido
+instalado, o el que indique ``CARD_PARSER``. ``benchmarks/bench_card_parser.py``
+compara velocidad y salida sobre páginas guardadas con ``--save-pages``.
+"""
+import os
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+try:
+    from bs4 import BeautifulSoup, Tag
+except ImportError:
+    BeautifulSoup = None
+
+CARD_TESTID = "property-card"
+TITLE_TESTID = "title"
+PRICE_TESTID = "price-and-discounted-price"
+STARS_CLASS = "ebc566407a"
+
+
+def _card(nombre, aria_label, precio_texto):
+    """Convierte los textos crudos de una tarjeta; None si no tiene nombre o precio válido"""
+    if not nombre:
+        return None
+    estrellas = None
+    if isinstance(aria_label, str):
+        try:
+            estrellas = float(aria_label.split(" ")[0].replace(",", "."))
+        except ValueError:
+            estrellas = None
+    precio_num = 0
+    if precio_texto is not None:
+        digitos = "".join(filter(str.isdigit, precio_texto))
+        if not digitos:
+            print(f"⚠️ Error procesando hotel: precio sin dígitos para {nombre}")
+            return None
+        precio_num = int(digitos)
+    if precio_num <= 0:
+        return None
+    return {"nombre": nombre, "estrellas": estrellas, "precio": precio_num}
+
+
+def _collect(cards):
+    return [card for card in cards if card is not None]
+
+
+def parse_bs4(html):
+    soup = BeautifulSoup(html, "html.parser")
+    tarjetas = []
+    for hotel in soup.find_all("div", {"data-testid": CARD_TESTID}):
+        nombre_element = hotel.find("div", {"data-testid": TITLE_TESTID})
+        if not nombre_element:
+            continue
+        estrellas_div = hotel.find("div", {"class": STARS_CLASS})
+        aria = estrellas_div.get("aria-label") if isinstance(estrellas_div, Tag) else None
+        precio_tag = hotel.find("span", {"data-testid": PRICE_TESTID})
+        precio_texto = precio_tag.get_text(strip=True) if isinstance(precio_tag, Tag) else None
+        tarjetas.append(_card(nombre_element.get_text(strip=True), aria, precio_texto))
+    return _collect(tarjetas)
+
+
+def _lxml_text(element):
+    # Igual que get_text(strip=True) de bs4: cada nodo de texto recortado y unido sin separador
+    return "".join(part.strip() for part in element.itertext())
+
+
+def parse_lxml(html):
+    root = lxml.html.fromstring(html)
+    tarjetas = []
+    for hotel in root.xpath(f'//div[@data-testid="{CARD_TESTID}"]'):
+        titulo = hotel.xpath(f'.//div[@data-testid="{TITLE_TESTID}"]')
+        if not titulo:
+            continue
+        estrellas_div = hotel.xpath(f'.//div[contains(concat(" ", normalize-space(@class), " "), " {STARS_CLASS} ")]')
+        aria = estrellas_div[0].get("aria-label") if estrellas_div else None
+        precio_tag = hotel.xpath(f'.//span[@data-testid="{PRICE_TESTID}"]')
+        precio_texto = _lxml_text(precio_tag[0]) if precio_tag else None
+        tarjetas.append(_card(_lxml_text(titulo[0]), aria, precio_texto))
+    return _collect(tarjetas)
+
+
+def parse_selectolax(html):
+    tree = LexborHTMLParser(html)
+    tarjetas = []
+    for hotel in tree.css(f'div[data-testid="{CARD_TESTID}"]'):
+        titulo = hotel.css_first(f'div[data-testid="{TITLE_TESTID}"]')
+        if titulo is None:
+            continue
+        estrellas_div = hotel.css_first(f'div.{STARS_CLASS}')
+        aria = estrellas_div.attributes.get("aria-label") if estrellas_div is not None else None
+        precio_tag = hotel.css_first(f'span[data-testid="{PRICE_TESTID}"]')
+        precio_texto = precio_tag.text(deep=True, separator="", strip=True) if precio_tag is not None else None
+        tarjetas.append(_card(titulo.text(deep=True, separator="", strip=True), aria, precio_texto))
+    return _collect(tarjetas)
+
+
+BACKENDS = {"selectolax": parse_selectolax, "lxml": parse_lxml, "bs4": parse_bs4}
+
+
+def available_backends():
+    disponibles = {"selectolax": LexborHTMLParser, "lxml": lxml, "bs4": BeautifulSoup}
+    return [name for name in BACKENDS if disponibles[name] is not None]
+
+
+DEFAULT_BACKEND = os.getenv("CARD_PARSER") or next(iter(available_backends()), "bs4")
+
+
+def parse_cards(html, backend=None):
+    """Tarjetas con precio válido de una página de resultados"""
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Parser desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+    return BACKENDS[backend](html)
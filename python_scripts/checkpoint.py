@@ -0,0 +1,57 @@
+"""Avance de una corrida larga guardado fecha por fecha, para retomarla si se cae.
+
+``scrape_hotels`` (por ciudad) y ``hotel_propio`` (por hotel) guardan aquí
+el resultado de cada fecha en cuanto la terminan. Si Chrome se cae o el
+proceso muere a mitad de la corrida, la siguiente corrida con la misma
+``firma`` (p. ej. el día y el número de días) solo pide las fechas que
+faltan. Si la firma es otra, el archivo viejo se ignora. Al terminar, la
+corrida llama a ``terminar()`` y el archivo se borra. Dos procesos con la
+misma firma suman sus fechas en vez de pisarse (``archivo_json``).
+
+    resultados/checkpoints/<nombre>.json
+"""
+import os
+import re
+import unicodedata
+
+import archivo_json
+
+CHECKPOINT_DIR = os.getenv('CHECKPOINT_DIR', os.path.join('resultados', 'checkpoints'))
+
+
+def _archivo(nombre):
+    texto = unicodedata.normalize('NFKD', nombre).encode('ascii', 'ignore').decode('ascii').lower()
+    return re.sub(r'[^a-z0-9]+', '_', texto).strip('_') + '.json'
+
+
+class Checkpoint:
+    def __init__(self, nombre, firma, directory=CHECKPOINT_DIR):
+        self.path = os.path.join(directory, _archivo(nombre))
+        self.firma = str(firma)
+        self._fechas = self._de_esta_firma(archivo_json.leer(self.path))
+
+    def _de_esta_firma(self, data):
+        if isinstance(data, dict) and data.get("firma") == self.firma:
+            return dict(data.get("fechas") or {})
+        return {}
+
+    def _fusionar(self, en_disco, data):
+        data["fechas"] = {**self._de_esta_firma(en_disco), **data["fechas"]}
+        return data
+
+    def hechas(self):
+        """{fecha: datos} de lo que ya se completó en esta corrida"""
+        return dict(self._fechas)
+
+    def guardar(self, fecha, datos):
+        self._fechas[str(fecha)] = datos
+        guardado = archivo_json.guardar(self.path, {"firma": self.firma, "fechas": dict(self._fechas)},
+                                        fusionar=self._fusionar)
+        self._fechas = guardado["fechas"]
+
+    def terminar(self):
+        self._fechas = {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
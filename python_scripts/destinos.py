@@ -0,0 +1,94 @@
+"""Destinos que rastrea ``scrape_hotels`` y cuándo toca refrescar cada uno.
+
+La lista vive en ``destinos.json`` en la raíz del proyecto (o en la ruta de
+``DESTINOS_FILE``)::
+
+    [
+      {"ciudad": "Tijuana", "dias": 30, "refrescar_horas": 24},
+      {"ciudad": "Ensenada", "dias": 14, "refrescar_horas": 12}
+    ]
+
+``dias`` es el horizonte de fechas de entrada a consultar y
+``refrescar_horas`` el intervalo del programador (``scrape_hotels.py
+--schedule``). Cada ciudad escribe ``resultados/hoteles_<ciudad>_promedios.json``,
+así Tijuana conserva el archivo de siempre. La última corrida de cada
+ciudad se guarda en ``resultados/destinos_estado.json``.
+"""
+import json
+import os
+import unicodedata
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+DESTINOS_FILE = os.getenv('DESTINOS_FILE', str(ROOT / 'destinos.json'))
+RESULTADOS_DIR = 'resultados'
+ESTADO_FILE = os.path.join(RESULTADOS_DIR, 'destinos_estado.json')
+
+DEFAULT_DESTINOS = [{"ciudad": "Tijuana", "dias": 30, "refrescar_horas": 24}]
+
+
+def slug(ciudad):
+    """'San Felipe' -> 'san_felipe', sin acentos"""
+    texto = unicodedata.normalize('NFKD', ciudad).encode('ascii', 'ignore').decode('ascii')
+    return '_'.join(texto.lower().split())
+
+
+def archivo_resultados(ciudad):
+    return os.path.join(RESULTADOS_DIR, f"hoteles_{slug(ciudad)}_promedios.json")
+
+
+def cargar_destinos(path=None):
+    path = path or DESTINOS_FILE
+    if not os.path.exists(path):
+        return [dict(d) for d in DEFAULT_DESTINOS]
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    destinos = []
+    for d in data:
+        if not d.get('ciudad'):
+            raise ValueError(f"Destino sin 'ciudad' en {path}: {d}")
+        destinos.append({
+            "ciudad": d['ciudad'],
+            "dias": int(d.get('dias', 30)),
+            "refrescar_horas": float(d.get('refrescar_horas', 24)),
+        })
+    return destinos
+
+
+def _leer_estado():
+    if not os.path.exists(ESTADO_FILE):
+        return {}
+    with open(ESTADO_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def marcar_actualizado(ciudades, cuando=None):
+    estado = _leer_estado()
+    cuando = (cuando or datetime.now()).isoformat(timespec='seconds')
+    for ciudad in ciudades:
+        estado[slug(ciudad)] = cuando
+    os.makedirs(RESULTADOS_DIR, exist_ok=True)
+    with open(ESTADO_FILE, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2)
+
+
+def _proxima_corrida(destino, estado):
+    ultima = estado.get(slug(destino['ciudad']))
+    if not ultima:
+        return datetime.min
+    return datetime.fromisoformat(ultima) + timedelta(hours=destino['refrescar_horas'])
+
+
+def pendientes(destinos, ahora=None):
+    """Destinos cuyo intervalo de refresco ya venció"""
+    ahora = ahora or datetime.now()
+    estado = _leer_estado()
+    return [d for d in destinos if _proxima_corrida(d, estado) <= ahora]
+
+
+def segundos_para_el_siguiente(destinos, ahora=None):
+    ahora = ahora or datetime.now()
+    estado = _leer_estado()
+    siguiente = min(_proxima_corrida(d, estado) for d in destinos)
+    return max(0.0, (siguiente - ahora).total_seconds())
@@ -0,0 +1,221 @@
+"""Predicción de precios por hotel para ``scrape_hotels``.
+
+Dos motores con la misma salida (un DataFrame ``ds``/``yhat`` por hotel que
+cubre sus fechas observadas y ``periods`` días más):
+
+    prophet   un ajuste de Prophet por hotel. Cada uno es trabajo de Stan en un
+              solo núcleo, así que se reparten en un ``ProcessPoolExecutor``.
+    numpy     regresión ridge sobre tendencia lineal y día de la semana,
+              resuelta para todos los hoteles a la vez como una matriz
+              hoteles × fechas. No importa Prophet ni Stan.
+
+``predecir`` devuelve los pronósticos en el mismo orden que las series de
+entrada; con un ``forecast_cache.ForecastCache`` solo ajusta las series que
+cambiaron desde la corrida anterior. ``benchmarks/backtest_forecast.py``
+compara error y tiempo de ambos motores.
+
+    FORECASTER         prophet | numpy (por defecto prophet)
+    FORECAST_WORKERS   procesos para Prophet (por defecto, núcleos disponibles;
+                       1 ajusta en el proceso actual)
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+FORECASTERS = ('prophet', 'numpy')
+DEFAULT_FORECASTER = os.getenv('FORECASTER', 'prophet')
+DEFAULT_WORKERS = int(os.getenv('FORECAST_WORKERS', '0')) or os.cpu_count() or 1
+
+
+def _quiet_stan():
+    # cmdstanpy y prophet registran cada ajuste en INFO; con muchos hoteles ahoga el log.
+    # cmdstanpy configura su logger al importarse, así que se importa antes de bajarlo
+    import prophet  # noqa: F401
+    for name in ('cmdstanpy', 'prophet'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def prophet_fit(precios, periods, init=None):
+    """Ajusta Prophet a ``[{"fecha", "precio"}]``; devuelve (``ds``/``yhat`` hasta ``periods`` días después, parámetros).
+
+    ``init`` son parámetros de un ajuste anterior para arrancar desde ahí (Prophet
+    descarta los que no tengan la forma esperada). Función de nivel de módulo
+    para poder ejecutarse en otro proceso.
+    """
+    from prophet import Prophet
+    df = pd.DataFrame(precios)
+    df = df.rename(columns={"fecha": "ds", "precio": "y"})
+    df["ds"] = pd.to_datetime(df["ds"])
+    model = Prophet()
+    if init:
+        model.fit(df, init={k: np.asarray(v) if isinstance(v, list) else v for k, v in init.items()})
+    else:
+        model.fit(df)
+    future = model.make_future_dataframe(periods=periods, freq='D')
+    forecast = model.predict(future)
+    params = {name: float(np.asarray(model.params[name]).ravel()[0]) for name in ('k', 'm', 'sigma_obs')}
+    params.update({name: np.asarray(model.params[name])[0].tolist() for name in ('delta', 'beta')})
+    return forecast[["ds", "yhat"]], params
+
+
+def prophet_forecast(precios, periods):
+    """Solo el pronóstico de ``prophet_fit``"""
+    return prophet_fit(precios, periods)[0]
+
+
+def _design(dias, inicio):
+    """Columnas: intercepto, tendencia en semanas y día de la semana (lunes es la base)"""
+    dow = (dias + 3) % 7  # 0 = lunes; 1970-01-01 fue jueves
+    X = np.zeros((len(dias), 8))
+    X[:, 0] = 1.0
+    X[:, 1] = (dias - inicio) / 7.0
+    for d in range(1, 7):
+        X[:, 1 + d] = dow == d
+    return X
+
+
+def numpy_forecast_batch(series, periods, ridge=1.0):
+    """Ridge por hotel sobre la matriz hoteles × fechas; mismo formato que ``prophet_forecast``"""
+    if not series:
+        return []
+    # Días desde la época por hotel; la rejilla común va de la primera fecha a la última predicha
+    observados = [pd.to_datetime([p["fecha"] for p in precios]).values.astype('datetime64[D]').astype(np.int64)
+                  for precios in series]
+    inicio = min(int(d.min()) for d in observados)
+    fin = max(int(d.max()) for d in observados) + periods
+    rejilla = np.arange(inicio, fin + 1)
+
+    Y = np.zeros((len(series), len(rejilla)))
+    M = np.zeros_like(Y)
+    for h, (dias, precios) in enumerate(zip(observados, series)):
+        Y[h, dias - inicio] = [p["precio"] for p in precios]
+        M[h, dias - inicio] = 1.0
+
+    # El intercepto no se penaliza; la tendencia y el día de la semana sí, para que
+    # series cortas o con huecos no den coeficientes extremos
+    X = _design(rejilla, inicio)
+    penalizacion = np.diag([0.0] + [ridge] * (X.shape[1] - 1))
+    A = np.einsum('hd,dk,dj->hkj', M, X, X) + penalizacion
+    b = np.einsum('hd,dk->hk', M * Y, X)
+    beta = np.linalg.solve(A, b[..., None])[..., 0]
+    yhat = beta @ X.T
+
+    pronosticos = []
+    for h, dias in enumerate(observados):
+        fechas = np.unique(dias)
+        fechas = np.concatenate([fechas, np.arange(fechas[-1] + 1, fechas[-1] + periods + 1)])
+        pronosticos.append(pd.DataFrame({
+            "ds": pd.to_datetime(fechas.astype('datetime64[D]')),
+            "yhat": yhat[h, fechas - inicio],
+        }))
+    return pronosticos
+
+
+def combinar_precios_lote(series, forecasts, today):
+    """``precios_por_dia`` de varios hoteles con una sola unión columnar.
+
+    Concatena los pronósticos (``ds``/``yhat``) de todos los hoteles, los une
+    por (hotel, fecha) con los precios reales y conserva los reales más los
+    predichos de ``today`` en adelante, en el orden de cada pronóstico.
+    """
+    if not forecasts:
+        return []
+    largos = np.array([len(df) for df in forecasts])
+    fc = pd.DataFrame({
+        "hotel": np.repeat(np.arange(len(forecasts)), largos),
+        "ds": np.concatenate([pd.to_datetime(df["ds"]).to_numpy(dtype="datetime64[ns]") for df in forecasts]),
+        "yhat": np.concatenate([pd.to_numeric(df["yhat"], errors="coerce").to_numpy(dtype=float)
+                                for df in forecasts]),
+    })
+    fc["fecha"] = np.datetime_as_string(fc["ds"].to_numpy().astype("datetime64[D]"), unit="D")
+    reales = pd.DataFrame(
+        [(h, p["fecha"], p["precio"]) for h, precios in enumerate(series) for p in precios],
+        columns=["hotel", "fecha", "precio"],
+    )
+    # Si una fecha se repite en los reales de un hotel, gana el último precio (como en un dict)
+    reales = reales.drop_duplicates(["hotel", "fecha"], keep="last")
+    merged = fc.merge(reales, on=["hotel", "fecha"], how="left", sort=False)
+
+    es_real = merged["precio"].notna().to_numpy()
+    conservar = es_real | (merged["ds"] >= pd.Timestamp(today)).to_numpy()
+    yhat = np.nan_to_num(merged["yhat"].to_numpy(), nan=0.0)
+    precio = np.where(es_real, merged["precio"].fillna(0).to_numpy(), np.round(yhat)).astype(np.int64)
+
+    fechas = merged["fecha"].to_numpy()
+    tipos = np.where(es_real, "real", "predicho")
+    hotel = merged["hotel"].to_numpy()
+    resultado = [[] for _ in forecasts]
+    for h, fecha, valor, tipo in zip(hotel[conservar], fechas[conservar], precio[conservar].tolist(),
+                                     tipos[conservar]):
+        resultado[h].append({"fecha": str(fecha), "precio": valor, "tipo": str(tipo)})
+    return resultado
+
+
+def combinar_precios(precios, forecast_df, today):
+    """``combinar_precios_lote`` para un solo hotel"""
+    return combinar_precios_lote([precios], [forecast_df], today)[0]
+
+
+def _ajustar(series, periods, workers, forecaster, inits):
+    """Devuelve [(pronóstico, parámetros o None)] en el orden de ``series``"""
+    if forecaster == 'numpy':
+        return [(df, None) for df in numpy_forecast_batch(series, periods)]
+    if forecaster != 'prophet':
+        raise ValueError(f"Motor de predicción desconocido: {forecaster} (opciones: {', '.join(FORECASTERS)})")
+    workers = min(workers or DEFAULT_WORKERS, len(series))
+    if workers <= 1:
+        _quiet_stan()
+        return [prophet_fit(precios, periods, init) for precios, init in zip(series, inits)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_quiet_stan) as executor:
+        return list(executor.map(prophet_fit, series, [periods] * len(series), inits))
+
+
+def _desde_cache(entry, periods):
+    """Pronóstico guardado recortado a ``periods`` días después de la última fecha observada"""
+    df = pd.DataFrame({"ds": pd.to_datetime(entry["ds"]), "yhat": entry["yhat"]})
+    ultima = pd.Timestamp(entry["ultima_fecha"])
+    return df[df["ds"] <= ultima + pd.Timedelta(days=periods)].reset_index(drop=True)
+
+
+def predecir(series, periods, workers=None, forecaster=None, cache=None, claves=None):
+    """Pronóstico de cada serie de precios, en el mismo orden que ``series``.
+
+    Con ``cache`` (un ``ForecastCache``) y ``claves`` (una por serie) solo se
+    ajustan las series que cambiaron; Prophet arranca desde los parámetros
+    guardados de cada hotel.
+    """
+    forecaster = forecaster or DEFAULT_FORECASTER
+    if cache is None or not series:
+        return [df for df, _ in _ajustar(series, periods, workers, forecaster, [None] * len(series))]
+
+    from forecast_cache import series_hash
+    resultados = [None] * len(series)
+    pendientes, inits, hashes = [], [], []
+    for i, (clave, precios) in enumerate(zip(claves, series)):
+        h = series_hash(precios, forecaster)
+        entry = cache.get(clave)
+        if entry and entry["hash"] == h and entry["periods"] >= periods:
+            resultados[i] = _desde_cache(entry, periods)
+            cache.hits += 1
+            continue
+        cache.misses += 1
+        pendientes.append(i)
+        hashes.append(h)
+        inits.append(entry.get("params") if entry else None)
+
+    ajustes = _ajustar([series[i] for i in pendientes], periods, workers, forecaster, inits)
+    for i, h, (df, params) in zip(pendientes, hashes, ajustes):
+        resultados[i] = df
+        cache.put(claves[i], {
+            "hash": h,
+            "periods": periods,
+            "ultima_fecha": max(p["fecha"] for p in series[i]),
+            "ds": df["ds"].dt.strftime("%Y-%m-%d").tolist(),
+            "yhat": [float(v) for v in df["yhat"]],
+            "params": params,
+        })
+    cache.evict()
+    return resultados
@@ -0,0 +1,76 @@
+"""Caché persistente de pronósticos por hotel.
+
+Cada hotel guarda en ``resultados/forecast_cache/<sha1>.json`` el hash de la
+serie con la que se ajustó, el pronóstico (fechas observadas más el horizonte
+pedido) y, con Prophet, los parámetros ajustados. En la siguiente corrida:
+
+- si la serie no cambió y el horizonte guardado alcanza, se reutiliza el
+  pronóstico sin ajustar nada;
+- si cambió, Prophet arranca desde los parámetros anteriores (``init``), que
+  converge en menos iteraciones que un ajuste en frío.
+
+El tamaño se acota por número de entradas: al pasarse se borran las usadas
+hace más tiempo (mtime, que se actualiza en cada acierto).
+
+    FORECAST_CACHE_DIR   directorio (por defecto resultados/forecast_cache)
+    FORECAST_CACHE_MAX   entradas máximas (por defecto 5000)
+    FORECAST_CACHE       0 para desactivarla
+"""
+import hashlib
+import json
+import os
+
+import archivo_json
+
+DEFAULT_DIR = os.getenv('FORECAST_CACHE_DIR', os.path.join('resultados', 'forecast_cache'))
+DEFAULT_MAX_ENTRIES = int(os.getenv('FORECAST_CACHE_MAX', '5000'))
+ENABLED = os.getenv('FORECAST_CACHE', '1') != '0'
+
+
+def series_hash(precios, forecaster):
+    """Huella de la serie (fechas y precios en orden) y del motor que la ajusta"""
+    puntos = sorted((p["fecha"], p["precio"]) for p in precios)
+    return hashlib.sha1(json.dumps([forecaster, puntos]).encode('utf-8')).hexdigest()
+
+
+class ForecastCache:
+    def __init__(self, directory=DEFAULT_DIR, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, clave):
+        return os.path.join(self.directory, hashlib.sha1(clave.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, clave):
+        """Entrada guardada para ``clave`` (o None): ``{"hash", "periods", "ds", "yhat", "params"}``"""
+        path = self._path(clave)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        return entry
+
+    def put(self, clave, entry):
+        # Temporal único por escritor: dos procesos que ajustan el mismo hotel no se pisan el .tmp
+        archivo_json.guardar(self._path(clave), entry)
+
+    def evict(self):
+        """Borra las entradas menos usadas hasta quedar en ``max_entries``"""
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith('.json')]
+        except FileNotFoundError:
+            return 0
+        sobrantes = len(names) - self.max_entries
+        if sobrantes <= 0:
+            return 0
+        paths = sorted((os.path.join(self.directory, n) for n in names), key=os.path.getmtime)
+        for path in paths[:sobrantes]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return sobrantes
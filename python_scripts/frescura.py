@@ -0,0 +1,102 @@
+"""Última observación de cada (ciudad, fecha de entrada, hotel) para el modo ``--incremental``.
+
+``scrape_hotels`` registra aquí las tarjetas de cada fecha que descarga. En
+modo incremental solo vuelve a pedir las fechas vencidas según la política de
+frescura y reutiliza las tarjetas guardadas del resto, así que la predicción
+sigue viendo los 30 días.
+
+La política asigna una antigüedad máxima según qué tan lejos está la fecha:
+
+    FRESCURA_POLITICA="1:1,3:3,7:6,14:12,30:24"
+
+significa mañana (y hoy) cada hora, hasta 3 días cada 3 h, hasta 7 días cada
+6 h, hasta 14 días cada 12 h y el resto una vez al día. El archivo vive en
+``resultados/frescura.json``; las fechas pasadas se descartan al guardar. Al
+guardar se funde con lo que otra corrida haya escrito mientras tanto: gana la
+observación más reciente de cada fecha y de cada hotel.
+"""
+import os
+from datetime import date, datetime, timedelta
+
+import archivo_json
+
+RESULTADOS_DIR = 'resultados'
+FRESCURA_FILE = os.path.join(RESULTADOS_DIR, 'frescura.json')
+DEFAULT_POLITICA = os.getenv('FRESCURA_POLITICA', '1:1,3:3,7:6,14:12,30:24')
+
+
+def parse_politica(texto=DEFAULT_POLITICA):
+    """``"1:1,7:6"`` -> [(1, 1.0), (7, 6.0)]: (hasta N días de anticipación, horas máximas)"""
+    politica = []
+    for tramo in texto.split(','):
+        dias, horas = tramo.split(':')
+        politica.append((int(dias), float(horas)))
+    if not politica:
+        raise ValueError('La política de frescura está vacía')
+    return sorted(politica)
+
+
+def max_antiguedad(dias_adelante, politica):
+    for limite, horas in politica:
+        if dias_adelante <= limite:
+            return timedelta(hours=horas)
+    return timedelta(hours=politica[-1][1])
+
+
+class FreshnessStore:
+    def __init__(self, path=FRESCURA_FILE):
+        self.path = path
+        # Un archivo corrupto o a medias equivale a no tener observaciones: todo se ve vencido
+        data = archivo_json.leer(path, {})
+        self._data = data if isinstance(data, dict) else {}
+
+    def registrar(self, ciudad, fecha, tarjetas, cuando=None):
+        """Guarda las tarjetas observadas para ``fecha``; los hoteles que ya no aparecen conservan su última observación"""
+        cuando = (cuando or datetime.now()).isoformat(timespec='seconds')
+        dia = self._data.setdefault(ciudad, {}).setdefault(str(fecha), {"visto": None, "hoteles": {}})
+        dia["visto"] = cuando
+        for t in tarjetas:
+            dia["hoteles"][t["nombre"]] = {"precio": t["precio"], "estrellas": t["estrellas"], "visto": cuando}
+
+    def ultima_visita(self, ciudad, fecha):
+        visto = self._data.get(ciudad, {}).get(str(fecha), {}).get("visto")
+        return datetime.fromisoformat(visto) if visto else None
+
+    def tarjetas(self, ciudad, fecha):
+        """Tarjetas vistas en la última descarga de ``fecha`` (mismo formato que card_parser)"""
+        dia = self._data.get(ciudad, {}).get(str(fecha))
+        if not dia:
+            return []
+        return [{"nombre": nombre, "estrellas": h["estrellas"], "precio": h["precio"]}
+                for nombre, h in dia["hoteles"].items() if h["visto"] == dia["visto"]]
+
+    def vencida(self, ciudad, fecha, politica, ahora=None, hoy=None):
+        ahora = ahora or datetime.now()
+        hoy = hoy or date.today()
+        visto = self.ultima_visita(ciudad, fecha)
+        if visto is None:
+            return True
+        return ahora - visto >= max_antiguedad((fecha - hoy).days, politica)
+
+    def guardar(self, hoy=None):
+        hoy = str(hoy or date.today())
+
+        def fusionar(en_disco, data):
+            if isinstance(en_disco, dict):
+                for ciudad, fechas in en_disco.items():
+                    for fecha, dia in fechas.items():
+                        data.setdefault(ciudad, {})[fecha] = _dia_mas_reciente(data.get(ciudad, {}).get(fecha), dia)
+            return {ciudad: {f: d for f, d in fechas.items() if f >= hoy} for ciudad, fechas in data.items()}
+
+        self._data = archivo_json.guardar(self.path, self._data, fusionar=fusionar)
+
+
+def _dia_mas_reciente(nuestro, suyo):
+    """Une dos observaciones de la misma fecha: la visita más reciente y, por hotel, su último precio"""
+    if not nuestro:
+        return suyo
+    hoteles = dict(suyo.get("hoteles", {}))
+    for nombre, h in nuestro.get("hoteles", {}).items():
+        if nombre not in hoteles or h["visto"] >= hoteles[nombre]["visto"]:
+            hoteles[nombre] = h
+    return {"visto": max(nuestro["visto"] or "", suyo.get("visto") or "") or None, "hoteles": hoteles}
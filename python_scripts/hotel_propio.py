@@ -1,5 +1,6 @@
 import asyncio
 import os
+import time
 import re
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
@@ -7,7 +8,11 @@ from supabase import create_client, Client, AsyncClient
 from playwright.async_api import async_playwright
 import uuid
 import random
-import requests
+import supabase_rest
+import metrics
+import checkpoint
+import resource_policy
+from progress import emit
 
 
 
@@ -58,7 +63,16 @@ USER_AGENTS = [
 def get_random_user_agent():
     return random.choice(USER_AGENTS)
 
-async def scrape_booking_prices(hotel_name: str, locale="en-us", currency="USD", headless_mode="new"):
+def fechas_del_dia():
+    """Las 30 fechas de check-in que cubre la corrida de hoy"""
+    today = datetime.today()
+    return [(today + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(0, 30)]
+
+def checkpoint_del_dia(user_id: str, hotel_name: str):
+    """Checkpoint de las 30 fechas del hotel de ese usuario; solo vale para la corrida de hoy"""
+    return checkpoint.Checkpoint(f"hotel_propio_{user_id}_{hotel_name}", datetime.today().strftime("%Y-%m-%d"))
+
+async def scrape_booking_prices(hotel_name: str, locale="en-us", currency="USD", headless_mode="new", user_id=""):
     user_agent = get_random_user_agent()
     # Convierte headless_mode a bool si es string
     if isinstance(headless_mode, str):
@@ -68,11 +82,19 @@ async def scrape_booking_prices(hotel_name: str, locale="en-us", currency="USD",
             headless = True  # "true" o "new" o cualquier otro string
     else:
         headless = headless_mode
+    punto = checkpoint_del_dia(user_id, hotel_name)
+    hechas = punto.hechas()
+    if len(hechas) == 30:
+        # La corrida anterior descargó todo y se cayó antes de subir
+        print(f"⏯️ Las 30 fechas de {hotel_name} ya están en {punto.path}")
+        return [hechas[f] for f in sorted(hechas)]
     # Elimina el try sin except/finally
     # try:
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=headless)
         page = await browser.new_page()
+        # En el contexto para que la pestaña del hotel que abre el clic también quede filtrada
+        await resource_policy.DEFAULT_POLICY.install_playwright(page.context)
         # Universal: set user-agent via extra headers
         await page.set_extra_http_headers({"user-agent": user_agent})
 
@@ -242,20 +264,30 @@ async def scrape_booking_prices(hotel_name: str, locale="en-us", currency="USD",
         # --- NUEVO: Scraping para los próximos 30 días, agrupado por día ---
         results = []
         base_url = page_to_scrape.url  # URL de la página de detalle del hotel
+        emit("start", total=30)
+        if hechas:
+            print(f"⏯️ Reanudando: {len(hechas)} fecha(s) ya descargadas en {punto.path}")
         for offset in range(0, 30):
             checkin = (today + timedelta(days=offset)).strftime("%Y-%m-%d")
             checkout = (today + timedelta(days=offset+1)).strftime("%Y-%m-%d")
+            if checkin in hechas:
+                results.append(hechas[checkin])
+                emit("date_scraped", fecha=checkin, habitaciones=len(hechas[checkin]["rooms"]), ok=True)
+                continue
             # Modifica la URL con las nuevas fechas
             new_url = re.sub(r"checkin=\d{4}-\d{2}-\d{2}", f"checkin={checkin}", base_url)
             new_url = re.sub(r"checkout=\d{4}-\d{2}-\d{2}", f"checkout={checkout}", new_url)
+            page_start = time.perf_counter()
             await page_to_scrape.goto(new_url)
             await asyncio.sleep(2) # Espera entre fechas
             try:
                 await page_to_scrape.wait_for_selector("#hprt-table", timeout=20000, state='visible')
+                metrics.STAGE_DURATION.observe(time.perf_counter() - page_start, script="hotel_propio", stage="booking_page")
             except Exception:
                 print(f"No se encontró la tabla de habitaciones para {checkin}")
                 html = await page_to_scrape.content()
                 print(f"[HTML para {checkin}]:\n" + html[:2000])
+                emit("date_scraped", fecha=checkin, habitaciones=0, ok=False)
                 continue
             rows = await page_to_scrape.query_selector_all("#hprt-table tr")
             day_rooms = []
@@ -287,6 +319,8 @@ async def scrape_booking_prices(hotel_name: str, locale="en-us", currency="USD",
                 else:
                     print(f"[No se encontró el selector #hprt-table para {checkin}]")
             results.append({"date": checkin, "rooms": day_rooms})
+            punto.guardar(checkin, results[-1])
+            emit("date_scraped", fecha=checkin, habitaciones=len(day_rooms), ok=True)
         await browser.close()
         popup_task.cancel()
         hotel_popup_task.cancel()
@@ -297,21 +331,13 @@ async def scrape_booking_prices(hotel_name: str, locale="en-us", currency="USD",
                         # -----SUPABASE----- #
                         # -----SUPABASE----- #
 
-async def insert_user_hotel_prices(user_id: str, hotel_name: str, results: list, jwt: str = ""): 
+async def insert_user_hotel_prices(user_id: str, hotel_name: str, results: list, jwt: str = ""):
+    """Sube los precios a ``hotel_usuario``; devuelve True solo si se guardaron todas las filas"""
     user_id = user_id.strip()
     if not is_valid_uuid(user_id):
         print("ERROR: user_id no es un UUID válido:", user_id)
-        return
-    SUPABASE_URL = os.getenv("SUPABASE_URL")
-    SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
-    url = f"{SUPABASE_URL}/rest/v1/hotel_usuario?on_conflict=user_id,hotel_name,checkin_date,room_type"
-    token = jwt if jwt else SUPABASE_KEY
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "Prefer": "resolution=merge-duplicates"
-    }
+        return False
+    ok = True
     for day in results:
         checkin_date = day["date"]
         for room in day["rooms"]:
@@ -324,16 +350,31 @@ async def insert_user_hotel_prices(user_id: str, hotel_name: str, results: list,
                 "price": room["price"]
             }
             try:
-                r = requests.post(url, headers=headers, json=data)
+                r = supabase_rest.upsert("hotel_usuario", data, "user_id,hotel_name,checkin_date,room_type", jwt=jwt)
                 print(f"Status: {r.status_code}, Response: {r.text}")
+                if r.status_code in (200, 201):
+                    emit("rows_uploaded", filas=1, fecha=checkin_date)
+                else:
+                    ok = False
             except Exception as e:
                 print("Error upserting:", data)
                 print("Exception:", e)
+                ok = False
+    return ok
 
 async def main(user_id: str, hotel_name: str, headless_mode="new", jwt: str = ""):
-    prices = await scrape_booking_prices(hotel_name, headless_mode=headless_mode)
+    user_id = user_id.strip()
+    prices = await scrape_booking_prices(hotel_name, headless_mode=headless_mode, user_id=user_id)
+    resource_policy.DEFAULT_POLICY.publicar("hotel_propio")
     print("Precios:", prices)
-    await insert_user_hotel_prices(user_id, hotel_name, prices, jwt=jwt)
+    with metrics.stage("hotel_propio", "upload"):
+        subido = await insert_user_hotel_prices(user_id, hotel_name, prices, jwt=jwt)
+    # El checkpoint se borra solo si están las 30 fechas y todas se subieron; si no, la próxima corrida retoma
+    completas = {day["date"] for day in prices} >= set(fechas_del_dia())
+    if completas and subido:
+        checkpoint_del_dia(user_id, hotel_name).terminar()
+    else:
+        print(f"⏯️ Corrida incompleta; el avance queda en {checkpoint_del_dia(user_id, hotel_name).path}")
     print("¡Listo!")
 
 # --- Bloque para ejecución directa por CLI ---
@@ -353,6 +394,7 @@ if __name__ == "__main__":
                 headless_mode = args[i+3]
             if arg == "--jwt" and i+3 < len(args):
                 jwt = args[i+3]
+        metrics.forward_to_stdout()
         asyncio.run(main(user_id, hotel_name, headless_mode, jwt))
     else:
         print("Modo API: ejecuta con 'uvicorn hotel_propio:app --reload'")
@@ -0,0 +1,167 @@
+"""Métricas en formato de texto de Prometheus, sin dependencias externas.
+
+El backend expone ``REGISTRY`` en ``GET /metrics``. Los scripts de scraping
+corren en otro proceso (subproceso o worker caliente), así que en ellos
+``forward_to_stdout()`` hace que cada observación salga como evento
+``@@progress`` de tipo ``metric``; el job que los ejecuta lo reconoce y lo
+registra en el ``REGISTRY`` del backend con ``record()``.
+
+Observar cuesta un ``bisect`` y un lock por métrica: se puede dejar activo en
+producción.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_forward = False
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        if _forward:
+            _forward_observation(self.name, value, labels)
+            return
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(k, list(v[0]), v[1]) for k, v in self._series.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}')
+            cumulative += counts[-1]
+            le = 'le="+Inf"'
+            lines.append(f'{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, key)} {total}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if _forward:
+            _forward_observation(self.name, amount, labels)
+            return
+        key = tuple(str(labels.get(n, '')) for n in self.labelnames)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    # Misma firma que Histogram para que record() no distinga
+    observe = inc
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = list(self._series.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_labels(self.labelnames, key)} {value}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._metrics.setdefault(name, Histogram(name, help_text, labelnames, buckets))
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._metrics.setdefault(name, Counter(name, help_text, labelnames))
+
+    def record(self, name, value, labels):
+        """Registra una observación reenviada desde un script; ignora métricas desconocidas"""
+        metric = self._metrics.get(name)
+        if metric is not None:
+            metric.observe(value, **labels)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_LATENCY = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Latencia de las rutas de Flask', ('route', 'method', 'status'))
+SUPABASE_LATENCY = REGISTRY.histogram(
+    'supabase_request_duration_seconds', 'Latencia de las llamadas a la API REST de Supabase', ('method', 'table'))
+SUPABASE_REQUESTS = REGISTRY.counter(
+    'supabase_requests_total', 'Llamadas a Supabase por código de respuesta', ('method', 'table', 'status'))
+JOB_DURATION = REGISTRY.histogram(
+    'scrape_job_duration_seconds', 'Duración de los jobs de scraping', ('kind', 'state'))
+STAGE_DURATION = REGISTRY.histogram(
+    'scrape_stage_duration_seconds', 'Duración de cada etapa dentro de los scripts de scraping', ('script', 'stage'))
+BLOCKED_REQUESTS = REGISTRY.counter(
+    'browser_blocked_requests_total', 'Peticiones de los navegadores bloqueadas por resource_policy', ('script', 'type'))
+BYTES_SAVED_ESTIMATED = REGISTRY.counter(
+    'browser_bytes_saved_estimated_total',
+    'Estimación (TYPICAL_BYTES por tipo, no medida) de los bytes que resource_policy evitó descargar', ('script',))
+PAGE_BYTES = REGISTRY.histogram(
+    'browser_page_bytes', 'Bytes transferidos por página de Booking', ('script',),
+    buckets=(50e3, 100e3, 250e3, 500e3, 1e6, 2.5e6, 5e6, 10e6, 25e6))
+
+
+def forward_to_stdout():
+    """Activa el reenvío de observaciones como eventos @@progress (llamar en los scripts)"""
+    global _forward
+    _forward = True
+
+
+def _forward_observation(name, value, labels):
+    from progress import emit
+    emit('metric', name=name, value=value, labels=labels)
+
+
+def stage(script, name):
+    """Context manager que mide una etapa de un script: ``with metrics.stage('scrape_hotels', 'prophet'):``"""
+    return STAGE_DURATION.time(script=script, stage=name)
@@ -0,0 +1,146 @@
+"""Historial local de precios: cada corrida de ``scrape_hotels`` se agrega, nada se sobrescribe.
+
+SQLite en ``resultados/historial_precios.sqlite`` (o ``PRICE_HISTORY_DB``),
+una fila por observación de (ciudad, hotel, fecha de estancia) con el precio y
+si fue real o predicho. ``scrape_ts`` identifica la corrida que la escribió y
+``visto`` cuándo se vio el precio: un precio real lleva la hora de su descarga
+(puede ser de una corrida anterior que se cayó y se retomó), uno predicho la de
+la corrida. Una observación (visto, ciudad, nombre, fecha, tipo) se guarda una
+sola vez, así que retomar una corrida no duplica filas. Los índices cubren las
+consultas de análisis:
+
+    (nombre, fecha, scrape_ts)   cómo cambió el precio de una noche con el tiempo
+    (ciudad, scrape_ts)          todo lo observado en una ciudad desde cierta corrida
+
+    >>> h = PriceHistory()
+    >>> h.precio_en_el_tiempo("Hotel Real del Río", "2025-08-01")
+    [("2025-07-16T10:00:03", "2025-07-16T10:02:11", 2087, "real"), ...]
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+DEFAULT_DB = os.getenv('PRICE_HISTORY_DB', os.path.join('resultados', 'historial_precios.sqlite'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS precios (
+    scrape_ts TEXT NOT NULL,
+    ciudad    TEXT NOT NULL,
+    nombre    TEXT NOT NULL,
+    fecha     TEXT NOT NULL,
+    precio    INTEGER NOT NULL,
+    tipo      TEXT NOT NULL,
+    estrellas REAL,
+    visto     TEXT
+);
+CREATE INDEX IF NOT EXISTS precios_nombre_fecha_ts ON precios (nombre, fecha, scrape_ts);
+CREATE INDEX IF NOT EXISTS precios_ciudad_ts ON precios (ciudad, scrape_ts);
+"""
+# Se crea después de migrar: una base vieja puede traer observaciones repetidas
+UNIQUE_INDEX = """
+CREATE UNIQUE INDEX IF NOT EXISTS precios_observacion ON precios (visto, ciudad, nombre, fecha, tipo);
+"""
+
+
+class PriceHistory:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._migrar()
+        self._lock = threading.Lock()
+
+    def _migrar(self):
+        """Bases creadas antes de ``visto``: la columna toma ``scrape_ts`` y se quitan las filas repetidas"""
+        columnas = {fila[1] for fila in self._conn.execute('PRAGMA table_info(precios)')}
+        with self._conn:
+            if 'visto' not in columnas:
+                self._conn.execute('ALTER TABLE precios ADD COLUMN visto TEXT')
+            self._conn.execute('UPDATE precios SET visto = scrape_ts WHERE visto IS NULL')
+            indices = {fila[1] for fila in self._conn.execute('PRAGMA index_list(precios)')}
+            if 'precios_observacion' not in indices:
+                self._conn.execute('DELETE FROM precios WHERE rowid NOT IN (SELECT MIN(rowid) FROM precios '
+                                   'GROUP BY visto, ciudad, nombre, fecha, tipo)')
+        self._conn.executescript(UNIQUE_INDEX)
+
+    def close(self):
+        self._conn.close()
+
+    def agregar(self, ciudad, resultado_final, scrape_ts=None, vistos=None):
+        """Agrega los ``precios_por_dia`` de la corrida ``scrape_ts``; devuelve cuántas filas nuevas escribió.
+
+        Con ``vistos`` ({fecha: visto ISO}) un precio real solo se agrega si su
+        fecha está ahí, y lleva esa hora en ``visto``; los reutilizados
+        (``--incremental``) ya están en el historial. Una observación que ya
+        estaba (corrida retomada) se ignora.
+        """
+        scrape_ts = scrape_ts or datetime.now().isoformat(timespec='seconds')
+        filas = []
+        for hotel in resultado_final:
+            for p in hotel.get("precios_por_dia", []):
+                visto = scrape_ts
+                if vistos is not None and p.get("tipo") == "real":
+                    if p["fecha"] not in vistos:
+                        continue
+                    visto = vistos[p["fecha"]]
+                filas.append((scrape_ts, ciudad, hotel["nombre"], p["fecha"], p["precio"], p.get("tipo", ""),
+                              hotel.get("estrellas"), visto))
+        with self._lock, self._conn:
+            antes = self._conn.total_changes
+            self._conn.executemany('INSERT OR IGNORE INTO precios (scrape_ts, ciudad, nombre, fecha, precio, tipo, '
+                                   'estrellas, visto) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', filas)
+            return self._conn.total_changes - antes
+
+    def _query(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def precio_en_el_tiempo(self, nombre, fecha, tipo=None):
+        """[(scrape_ts, visto, precio, tipo)] del hotel para la noche ``fecha``, de la observación más vieja a la más nueva"""
+        sql = 'SELECT scrape_ts, visto, precio, tipo FROM precios WHERE nombre = ? AND fecha = ?'
+        params = [nombre, str(fecha)]
+        if tipo:
+            sql += ' AND tipo = ?'
+            params.append(tipo)
+        return self._query(sql + ' ORDER BY visto', params)
+
+    def serie_real(self, nombre, desde=None, hasta=None):
+        """Último precio real observado de cada noche del hotel: [{"fecha", "precio"}] ordenado por fecha"""
+        sql = ('SELECT fecha, precio FROM precios WHERE nombre = ? AND tipo = \'real\''
+               ' AND fecha >= ? AND fecha <= ? ORDER BY fecha, visto')
+        filas = self._query(sql, [nombre, str(desde or '0000-00-00'), str(hasta or '9999-99-99')])
+        ultimo = {}
+        for fecha, precio in filas:
+            ultimo[fecha] = precio
+        return [{"fecha": f, "precio": p} for f, p in ultimo.items()]
+
+    def series_reales(self, ciudad=None):
+        """``serie_real`` de todos los hoteles (de una ciudad) en una sola consulta: {nombre: [{"fecha", "precio"}]}"""
+        sql = 'SELECT nombre, fecha, precio FROM precios WHERE tipo = \'real\''
+        params = []
+        if ciudad:
+            sql += ' AND ciudad = ?'
+            params.append(ciudad)
+        series = {}
+        for nombre, fecha, precio in self._query(sql + ' ORDER BY nombre, fecha, visto', params):
+            series.setdefault(nombre, {})[fecha] = precio
+        return {nombre: [{"fecha": f, "precio": p} for f, p in dias.items()] for nombre, dias in series.items()}
+
+    def hoteles(self, ciudad=None):
+        if ciudad:
+            return [r[0] for r in self._query('SELECT DISTINCT nombre FROM precios WHERE ciudad = ? ORDER BY nombre',
+                                              [ciudad])]
+        return [r[0] for r in self._query('SELECT DISTINCT nombre FROM precios ORDER BY nombre', [])]
+
+    def corridas(self, ciudad=None):
+        """[(scrape_ts, filas)] de cada corrida registrada"""
+        sql = 'SELECT scrape_ts, COUNT(*) FROM precios'
+        params = []
+        if ciudad:
+            sql += ' WHERE ciudad = ?'
+            params.append(ciudad)
+        return self._query(sql + ' GROUP BY scrape_ts ORDER BY scrape_ts', params)
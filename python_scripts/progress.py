@@ -0,0 +1,25 @@
+"""Eventos de progreso estructurados para los scripts de scraping.
+
+Cada evento se imprime como una línea ``@@progress {json}``. Ejecutado a mano
+es solo una línea más del log; cuando el script corre como job del backend,
+``job_queue`` reconoce el prefijo y actualiza el progreso del job.
+"""
+import json
+
+PREFIX = "@@progress "
+
+
+def emit(event, **data):
+    """Imprime un evento de progreso (p. ej. emit("date_scraped", fecha=..., hoteles=12))"""
+    data["event"] = event
+    print(PREFIX + json.dumps(data, ensure_ascii=False, default=str), flush=True)
+
+
+def parse(line):
+    """Devuelve el evento contenido en una línea de log, o None si no es un evento"""
+    if not line.startswith(PREFIX):
+        return None
+    try:
+        return json.loads(line[len(PREFIX):])
+    except ValueError:
+        return None
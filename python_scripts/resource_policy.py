@@ -0,0 +1,162 @@
+"""Qué subrecursos pueden descargar los navegadores de los scrapers.
+
+De cada página de Booking (y de Songkick) solo se usa el DOM; imágenes,
+fuentes, video, mosaicos de mapa y scripts de analítica o rastreo se bloquean
+antes de salir a la red. Una sola política la usan Selenium (``booking_fetch``
+y ``scrape_songkick``, vía CDP ``Network.setBlockedURLs``) y Playwright
+(``hotel_propio`` y el backend, vía ``page.route``):
+
+    RESOURCE_BLOCKING=0        desactiva el bloqueo
+    RESOURCE_BLOCK_TYPES       tipos bloqueados (por defecto image,media,font)
+    RESOURCE_BLOCK_HOSTS       hosts o fragmentos de URL extra a bloquear
+    RESOURCE_ALLOW             fragmentos de URL que nunca se bloquean
+
+La lista de permitidos gana sobre todo lo demás en Playwright. En Selenium,
+CDP no acepta excepciones, así que solo quita los hosts bloqueados que ella
+misma menciona; los tipos se bloquean por extensión (``*.png``, ``*.woff2``...).
+
+CDP y ``page.route`` no dicen cuánto habría pesado una petición abortada, así
+que los bytes ahorrados no se miden: son una estimación con ``TYPICAL_BYTES``
+por tipo y se reportan como tal (``metrics.BYTES_SAVED_ESTIMATED``, "estimado
+por tipo" en consola). Los bytes que sí se transfieren se miden (performance
+log de Chrome) y van a ``metrics.PAGE_BYTES``. El ahorro real se mide cargando
+la misma página con y sin bloqueo (``benchmarks/bench_resource_blocking.py``).
+"""
+import json
+import os
+import threading
+
+import metrics
+
+
+def _lista(texto):
+    return tuple(x.strip() for x in texto.split(',') if x.strip())
+
+
+ENABLED = os.getenv('RESOURCE_BLOCKING', '1') != '0'
+BLOCK_TYPES = _lista(os.getenv('RESOURCE_BLOCK_TYPES', 'image,media,font'))
+BLOCK_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'connect.facebook.net', 'facebook.com/tr', 'bat.bing.com', 'hotjar.com', 'criteo.com', 'criteo.net',
+    'tiqcdn.com', 'maps.googleapis.com', 'maps.gstatic.com', 'tile.openstreetmap.org',
+) + _lista(os.getenv('RESOURCE_BLOCK_HOSTS', ''))
+# Documento, bundles JS/CSS y XHR de Booking con los que se dibujan las tarjetas y la tabla de precios
+ALLOW = _lista(os.getenv('RESOURCE_ALLOW', 'booking.com/searchresults,booking.com/hotel/,bstatic.com/psb/capla,'
+                                           'booking.com/dml/graphql'))
+
+EXTENSIONS = {
+    'image': ('png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico'),
+    'font': ('woff', 'woff2', 'ttf', 'otf', 'eot'),
+    'media': ('mp4', 'webm', 'mp3', 'm3u8'),
+    'stylesheet': ('css',),
+}
+# Peso típico de una petición de cada tipo en Booking, para estimar lo ahorrado
+TYPICAL_BYTES = {'image': 30_000, 'media': 250_000, 'font': 35_000, 'script': 40_000, 'stylesheet': 25_000,
+                 'xhr': 3_000, 'fetch': 3_000, 'ping': 500, 'other': 5_000}
+
+
+class ResourcePolicy:
+    def __init__(self, types=BLOCK_TYPES, hosts=BLOCK_HOSTS, allow=ALLOW, enabled=ENABLED):
+        self.types = frozenset(t.lower() for t in types)
+        self.hosts = tuple(hosts)
+        self.allow = tuple(allow)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._bloqueadas = {}
+        self._paginas = []
+
+    def permitido(self, url):
+        return any(a in url for a in self.allow)
+
+    def bloquear(self, url, tipo):
+        """True si la petición a ``url`` (``tipo`` como lo nombra Playwright) no debe salir"""
+        if not self.enabled or self.permitido(url):
+            return False
+        return tipo.lower() in self.types or any(h in url for h in self.hosts)
+
+    def selenium_patterns(self):
+        patrones = [f'*.{ext}*' for tipo in sorted(self.types) for ext in EXTENSIONS.get(tipo, ())]
+        patrones += [f'*{h}*' for h in self.hosts if not self.permitido(h)]
+        return patrones
+
+    # --- Selenium ---
+
+    def chrome_options(self, options):
+        """Activa el performance log, de donde ``medir_selenium`` saca bytes y bloqueos"""
+        if self.enabled:
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        return options
+
+    def install_selenium(self, driver):
+        if not self.enabled:
+            return
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.selenium_patterns()})
+
+    def medir_selenium(self, driver):
+        """Lee el performance log acumulado desde la última página y lo suma a los contadores"""
+        if not self.enabled:
+            return
+        try:
+            entries = driver.get_log('performance')
+        except Exception:  # sesión caída: la medición no debe tapar el error de la página
+            return
+        tipos, transferidos, bloqueadas = {}, 0, []
+        for entry in entries:
+            message = json.loads(entry['message'])['message']
+            params = message.get('params', {})
+            if message['method'] == 'Network.requestWillBeSent':
+                tipos[params['requestId']] = params.get('type', 'Other').lower()
+            elif message['method'] == 'Network.loadingFinished':
+                transferidos += params.get('encodedDataLength', 0)
+            elif message['method'] == 'Network.loadingFailed' and params.get('blockedReason'):
+                bloqueadas.append(tipos.get(params['requestId'], params.get('type', 'Other').lower()))
+        self._registrar(bloqueadas, transferidos)
+
+    # --- Playwright ---
+
+    async def install_playwright(self, target):
+        """``target`` es una página o un contexto; sus pestañas nuevas heredan la ruta si es el contexto"""
+        if not self.enabled:
+            return
+
+        async def handler(route):
+            request = route.request
+            if self.bloquear(request.url, request.resource_type):
+                self._registrar([request.resource_type], 0, pagina=False)
+                await route.abort('blockedbyclient')
+            else:
+                await route.continue_()
+
+        await target.route('**/*', handler)
+
+    # --- Totales ---
+
+    def _registrar(self, tipos, transferidos, pagina=True):
+        with self._lock:
+            for tipo in tipos:
+                self._bloqueadas[tipo] = self._bloqueadas.get(tipo, 0) + 1
+            if pagina:
+                self._paginas.append(transferidos)
+
+    def publicar(self, script):
+        """Pasa los totales acumulados a ``metrics`` (llamar desde el hilo principal) y los reinicia"""
+        with self._lock:
+            bloqueadas, self._bloqueadas = self._bloqueadas, {}
+            paginas, self._paginas = self._paginas, []
+        estimados = sum(TYPICAL_BYTES.get(t, TYPICAL_BYTES['other']) * n for t, n in bloqueadas.items())
+        for tipo, n in bloqueadas.items():
+            metrics.BLOCKED_REQUESTS.inc(n, script=script, type=tipo)
+        if estimados:
+            metrics.BYTES_SAVED_ESTIMATED.inc(estimados, script=script)
+        for transferidos in paginas:
+            metrics.PAGE_BYTES.observe(transferidos, script=script)
+        total = sum(bloqueadas.values())
+        if total or paginas:
+            por_pagina = f", {sum(paginas) / len(paginas) / 1024:.0f} KB por página" if paginas else ""
+            print(f"🧹 {total} peticiones bloqueadas (~{estimados / 1024 / 1024:.1f} MB ahorrados, estimado por tipo)"
+                  f"{por_pagina}")
+        return {"bloqueadas": total, "bytes_ahorrados_estimados": estimados, "paginas": len(paginas)}
+
+
+DEFAULT_POLICY = ResourcePolicy()
@@ -1,9 +1,3 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup, Tag
 from datetime import datetime, timedelta
 import json
 import time
@@ -11,17 +5,25 @@ import statistics
 import sys
 import io
 import os
-import requests
 from dotenv import load_dotenv
 from pathlib import Path
 import json as pyjson
-from prophet import Prophet
 import pandas as pd
-import numpy as np
 import uuid
 import jwt
-
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+from progress import emit
+import metrics
+import booking_fetch
+import card_parser
+import destinos
+import forecast
+import forecast_cache
+import frescura
+import price_history
+import upload_pipeline
+import checkpoint
+import resource_policy
+from urllib.parse import quote_plus
 
 # Cargar .env desde la raíz del proyecto
 load_dotenv(dotenv_path=Path(__file__).parent.parent / '.env')
@@ -39,22 +41,19 @@ def is_valid_uuid(val):
     except ValueError:
         return False
 
-def insert_hotels_supabase(user_id, resultado_final, supabase_url, supabase_key, user_jwt=None):
+def insert_hotels_supabase(user_id, resultado_final, supabase_url, supabase_key, user_jwt=None, fechas_reales=None):
+    """Sube las filas de ``resultado_final``; con ``fechas_reales`` solo sube los precios reales de esas fechas"""
     if not is_valid_uuid(user_id):
         print("ERROR: user_id no es un UUID válido:", user_id)
         return
-    url = f"{supabase_url}/rest/v1/hotels?on_conflict=nombre,fecha"
-    headers = {
-        "apikey": supabase_key,
-        "Authorization": f"Bearer {user_jwt if user_jwt else supabase_key}",
-        "Content-Type": "application/json",
-        "Prefer": "resolution=merge-duplicates"
-    }
 
     # 1. Armar la lista de todos los registros
     registros = []
     for hotel in resultado_final:
         for precio_dia in hotel.get("precios_por_dia", []):
+            if fechas_reales is not None and precio_dia.get("tipo") == "real" and precio_dia["fecha"] not in fechas_reales:
+                # Precio real reutilizado de una corrida anterior: ya está en Supabase
+                continue
             data = {
                 "user_id": user_id,
                 "nombre": hotel["nombre"],
@@ -69,126 +68,200 @@ def insert_hotels_supabase(user_id, resultado_final, supabase_url, supabase_key,
             }
             registros.append(data)
 
-    # 2. Insertar en lotes
-    batch_size = 100  # Puedes ajustar el tamaño del lote
-    total = len(registros)
-    for i in range(0, total, batch_size):
-        batch = registros[i:i+batch_size]
-        r = requests.post(url, headers=headers, json=batch)
-        print(f"Status: {r.status_code} Response: {r.text}")
-        if r.status_code in (200, 201):
-            print(f"✅ [{i+1}-{min(i+batch_size, total)}/{total}] Lote guardado correctamente.")
-        else:
-            print(f"❌ [{i+1}-{min(i+batch_size, total)}/{total}] Error guardando lote: {r.status_code}")
-            if "Could not find the" in r.text:
-                print("Error estructural en la base de datos. Abortando el guardado masivo.")
-                break
-        time.sleep(0.05)
+    # 2. Insertar en lotes concurrentes, solo las filas que cambiaron desde la última subida
+    ledger = upload_pipeline.UploadLedger() if upload_pipeline.DELTA else None
+    resumen = upload_pipeline.upload_rows(
+        "hotels", registros, "nombre,fecha", scope=f"hotels:{user_id}", ledger=ledger,
+        on_batch=lambda filas, acumulado, total: emit("rows_uploaded", filas=filas, acumulado=acumulado,
+                                                      total_filas=total),
+        jwt=user_jwt, url=supabase_url, key=supabase_key)
+    if ledger is not None:
+        ledger.descartar_fechas_pasadas(datetime.now().date())
+        ledger.guardar()
+    print(f"📤 {resumen['enviadas']} filas subidas, {resumen['omitidas']} sin cambios omitidas, "
+          f"{resumen['fallidas']} fallidas en {resumen['lotes']} lotes ({resumen['segundos']}s)")
+    return resumen
 
-def scrape_hotels(user_id, user_jwt=None):
-    """Scrape hotel prices from Booking.com"""
-    print("🏨 Iniciando scraping de hoteles en Tijuana...")
-    
-    # Configure browser
-    options = Options()
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36")
-    #options.add_argument("--headless")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    
-    driver = webdriver.Chrome(options=options)
+# Booking muestra 25 tarjetas por página; las siguientes se piden con offset=
+PAGE_SIZE = 25
+MAX_PAGES = int(os.getenv('SCRAPE_MAX_PAGES', '20'))
+# Páginas de una misma fecha que se piden a la vez después de la primera
+PAGE_WAVE = int(os.getenv('SCRAPE_PAGE_WAVE', '3'))
 
-    # Date range
+def booking_url(ciudad, checkin, checkout, offset=0):
+    url = (
+        "https://www.booking.com/searchresults.es.html?"
+        f"ss={quote_plus(ciudad)}&checkin={checkin}&checkout={checkout}&group_adults=1&no_rooms=1&group_children=0&ht_id=204"
+    )
+    return f"{url}&offset={offset}" if offset else url
+
+def tarjetas_unicas(paginas):
+    """Tarjetas de una fecha en orden de offset, sin repetir hotel (Booking puede reordenar entre páginas)"""
+    vistos = set()
+    unicas = []
+    for offset in sorted(paginas):
+        for tarjeta in paginas[offset]:
+            if tarjeta["nombre"] not in vistos:
+                vistos.add(tarjeta["nombre"])
+                unicas.append(tarjeta)
+    return unicas
+
+def crawl_destinos(destinos_a_rastrear, browsers=None, fetcher=None, fixtures_dir=None, save_pages=None,
+                   incremental=False, politica=None, puntos=None):
+    """Descarga las páginas de todas las ciudades con un solo pool de navegadores.
+
+    Las fechas de todas las ciudades se intercalan en la misma cola, así que
+    comparten navegadores y límite de tasa. Con ``incremental`` solo se piden
+    las fechas vencidas según ``frescura``; el resto se toma de la última
+    observación guardada.
+
+    ``puntos`` ({ciudad: Checkpoint}) guarda cada fecha terminada; las que ya
+    estaban en el checkpoint no se vuelven a pedir. Devuelve
+    ``({ciudad: hoteles_info}, {ciudad: {fecha descargada: visto}}, {ciudad: completa})``:
+    una ciudad está completa si no hubo error general y cada una de sus fechas
+    se descargó (en esta corrida o en la retomada) o se tomó de ``frescura``.
+    """
     hoy = datetime.today().date()
-    dias_a_buscar = 30
+    browsers = browsers or booking_fetch.DEFAULT_BROWSERS
+    fetcher = fetcher or booking_fetch.DEFAULT_FETCHER
+    fechas = {d["ciudad"]: [hoy + timedelta(days=i) for i in range(d["dias"])] for d in destinos_a_rastrear}
+    todas = [(ciudad, f[i]) for i in range(max(len(f) for f in fechas.values()))
+             for ciudad, f in fechas.items() if i < len(f)]
+
+    # Tarjetas por (ciudad, fecha) y offset; se combinan en orden de fecha y de
+    # página al final, sin importar en qué orden terminen los navegadores
+    tarjetas_por_fecha = {clave: {} for clave in todas}
+    store = frescura.FreshnessStore()
+    descargadas = {ciudad: {} for ciudad in fechas}
+    reanudadas = set()
+    for ciudad, punto in (puntos or {}).items():
+        for fecha, hecha in punto.hechas().items():
+            clave = (ciudad, datetime.strptime(fecha, "%Y-%m-%d").date())
+            if clave in tarjetas_por_fecha:
+                tarjetas_por_fecha[clave][0] = hecha["tarjetas"]
+                store.registrar(ciudad, clave[1], hecha["tarjetas"], datetime.fromisoformat(hecha["visto"]))
+                descargadas[ciudad][fecha] = hecha["visto"]
+                reanudadas.add(clave)
+    if reanudadas:
+        print(f"⏯️ Reanudando: {len(reanudadas)} fecha(s) ya descargadas en el checkpoint")
+    claves = [c for c in todas if c not in reanudadas]
+    if incremental:
+        politica = frescura.parse_politica(politica or frescura.DEFAULT_POLITICA)
+        claves = [c for c in claves if store.vencida(c[0], c[1], politica, hoy=hoy)]
+        for clave in todas:
+            if clave not in claves and clave not in reanudadas:
+                tarjetas_por_fecha[clave][0] = store.tarjetas(*clave)
+        print(f"♻️ Incremental: {len(claves)} de {len(todas)} fechas vencidas; el resto se toma de {store.path}")
+    # Por fecha: offsets de la tanda en curso, páginas pendientes, siguiente offset
+    estado = {clave: {"tanda": [], "pendientes": 0, "siguiente": 0, "vistos": set(), "fin": False}
+              for clave in claves}
+    emit("start", total=len(claves))
+    print(f"🌐 Fetcher {fetcher}: {browsers} descarga(s) en paralelo, "
+          f"{booking_fetch.DEFAULT_MIN_INTERVAL}s mínimo entre páginas, hasta {MAX_PAGES} páginas por fecha")
 
-    # Dictionary to accumulate prices per hotel
-    hoteles_info = {}
+    def encolar(crawler, clave, paginas):
+        ciudad, checkin = clave
+        st = estado[clave]
+        st["tanda"] = []
+        for _ in range(paginas):
+            if st["siguiente"] >= MAX_PAGES * PAGE_SIZE:
+                break
+            offset = st["siguiente"]
+            crawler.submit((clave, offset), booking_url(ciudad, checkin, checkin + timedelta(days=1), offset))
+            st["tanda"].append(offset)
+            st["siguiente"] += PAGE_SIZE
+            st["pendientes"] += 1
+
+    def cerrar_tanda(clave):
+        """Revisa la tanda en orden de offset; termina la fecha si una página no aporta hoteles nuevos"""
+        st = estado[clave]
+        for offset in st["tanda"]:
+            tarjetas = tarjetas_por_fecha[clave].get(offset)
+            nuevos = {t["nombre"] for t in tarjetas or []} - st["vistos"]
+            st["vistos"] |= nuevos
+            if not nuevos:
+                st["fin"] = True
+        if st["siguiente"] >= MAX_PAGES * PAGE_SIZE:
+            st["fin"] = True
 
     try:
-        for i in range(dias_a_buscar):
-            checkin = hoy + timedelta(days=i)
-            checkout = checkin + timedelta(days=1)
-            
-            url = (
-                "https://www.booking.com/searchresults.es.html?"
-                f"ss=Tijuana&checkin={checkin}&checkout={checkout}&group_adults=1&no_rooms=1&group_children=0&ht_id=204"
-            )
-            
-            print(f"📅 Consultando hoteles para {checkin} → {checkout}")
-            driver.get(url)
-            
-            
-            try:
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-testid='property-card']"))
-                )
-            except Exception as e:
-                print(f"❌ No se pudieron cargar los hoteles para {checkin}: {e}")
-                continue
-            
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            hotels = soup.find_all("div", {"data-testid": "property-card"})
-            
-            hotels_found = 0
-            for hotel in hotels:  # type: ignore
-                try:
-                    # Get hotel name
-                    nombre_element = hotel.find("div", {"data-testid": "title"})  # type: ignore
-                    if not nombre_element:
-                        continue
-                    nombre = nombre_element.get_text(strip=True)
-
-                    # Get stars using aria-label
-                    estrellas = None
-                    estrellas_div = hotel.find("div", {"class": "ebc566407a"})  # type: ignore
-                    if isinstance(estrellas_div, Tag) and estrellas_div.has_attr("aria-label"):
-                        texto = estrellas_div.get("aria-label")
-                        if isinstance(texto, str):
-                            try:
-                                estrellas = float(texto.split(" ")[0].replace(",", "."))
-                            except Exception:
-                                estrellas = None
-
-                    # Get price
-                    precio_tag = hotel.find("span", {"data-testid": "price-and-discounted-price"})  # type: ignore
-                    precio_num = 0
-                    if isinstance(precio_tag, Tag):
-                        precio_texto = precio_tag.get_text(strip=True)  # type: ignore
-                        # Extract numbers from price text
-                        precio_num = int("".join(filter(str.isdigit, precio_texto)))
-
-                    if precio_num > 0:  # Valid price
-                        if nombre not in hoteles_info:
-                            hoteles_info[nombre] = {
-                                "Nombre del Hotel": nombre,
-                                "Estrellas": estrellas,
-                                "Precios": []
-                            }
-                        hoteles_info[nombre]["Precios"].append({
-                            "fecha": str(checkin),
-                            "precio": precio_num
-                        })
-                        hotels_found += 1
-
-                except Exception as e:
-                    print(f"⚠️ Error procesando hotel: {e}")
+        with booking_fetch.PageCrawler(browsers, fetcher=fetcher, fixtures_dir=fixtures_dir,
+                                       save_dir=save_pages) as crawler:
+            for clave in claves:
+                encolar(crawler, clave, 1)
+            for (clave, offset), html, error, segundos, origen in crawler.results():
+                ciudad, checkin = clave
+                st = estado[clave]
+                st["pendientes"] -= 1
+                metrics.STAGE_DURATION.observe(segundos, script="scrape_hotels", stage="booking_page")
+                if html is None:
+                    if offset == 0:
+                        print(f"❌ No se pudieron cargar los hoteles de {ciudad} para {checkin}: {error}")
+                else:
+                    with metrics.stage("scrape_hotels", "parse"):
+                        tarjetas_por_fecha[clave][offset] = card_parser.parse_cards(html)
+                    print(f"📅 {ciudad} {checkin} página {offset // PAGE_SIZE + 1}: "
+                          f"{len(tarjetas_por_fecha[clave][offset])} hoteles ({origen}, {segundos:.1f}s)")
+                if st["pendientes"]:
+                    continue
+                cerrar_tanda(clave)
+                if not st["fin"]:
+                    encolar(crawler, clave, PAGE_WAVE)
                     continue
-            
-            print(f"🏨 Procesados {hotels_found} hoteles")
-            time.sleep(2.5)  # Rate limiting
+                ok = 0 in tarjetas_por_fecha[clave]
+                if ok:
+                    unicas = tarjetas_unicas(tarjetas_por_fecha[clave])
+                    ahora = datetime.now()
+                    visto = ahora.isoformat(timespec='seconds')
+                    store.registrar(ciudad, checkin, unicas, ahora)
+                    descargadas[ciudad][str(checkin)] = visto
+                    if puntos and ciudad in puntos:
+                        puntos[ciudad].guardar(checkin, {"visto": visto, "tarjetas": unicas})
+                print(f"🏨 {ciudad} {checkin}: {len(st['vistos'])} hoteles en {len(tarjetas_por_fecha[clave])} página(s)")
+                emit("date_scraped", ciudad=ciudad, fecha=str(checkin), hoteles=len(st["vistos"]), ok=ok)
 
     except Exception as e:
         print(f"❌ Error general durante scraping: {e}")
-    finally:
-        driver.quit()
+        completo = False
+    else:
+        completo = True
+    reutilizadas = set(todas) - set(claves) - reanudadas
+    completas = {ciudad: completo and all(str(f) in descargadas[ciudad] or (ciudad, f) in reutilizadas
+                                          for f in dias)
+                 for ciudad, dias in fechas.items()}
+    store.guardar(hoy)
+    resource_policy.DEFAULT_POLICY.publicar("scrape_hotels")
+    if incremental:
+        # Una fecha vencida que no se pudo descargar conserva su última observación
+        for clave in claves:
+            if 0 not in tarjetas_por_fecha[clave]:
+                tarjetas_por_fecha[clave] = {0: store.tarjetas(*clave)}
 
+    # Dictionary to accumulate prices per hotel, por ciudad
+    hoteles_por_ciudad = {ciudad: {} for ciudad in fechas}
+    for (ciudad, checkin) in sorted(todas, key=lambda clave: clave[1]):
+        hoteles_info = hoteles_por_ciudad[ciudad]
+        for tarjeta in tarjetas_unicas(tarjetas_por_fecha[(ciudad, checkin)]):
+            nombre = tarjeta["nombre"]
+            if nombre not in hoteles_info:
+                hoteles_info[nombre] = {
+                    "Nombre del Hotel": nombre,
+                    "Estrellas": tarjeta["estrellas"],
+                    "Precios": []
+                }
+            hoteles_info[nombre]["Precios"].append({
+                "fecha": str(checkin),
+                "precio": tarjeta["precio"]
+            })
+    return hoteles_por_ciudad, descargadas, completas
+
+def calcular_resultados(hoteles_info, user_id, workers=None, forecaster=None, ciudad="Tijuana", usar_cache=True):
+    """Promedio y predicción de precios por hotel"""
     # Calculate average per hotel
     print("📊 Procesando datos de precios...")
     print("🧮 Calculando promedios por hotel...")
     
-    resultado_final = []
+    candidatos = []
     for hotel in hoteles_info.values():
         precios = hotel["Precios"]
         print(f"Procesando hotel: {hotel['Nombre del Hotel']}")
@@ -196,49 +269,43 @@ def scrape_hotels(user_id, user_jwt=None):
         if len(precios) < 2:
             print(f"[ADVERTENCIA] Hotel '{hotel['Nombre del Hotel']}' tiene menos de 2 precios reales. Saltando predicción y promedio.")
             continue
-        # Prepara datos para Prophet
-        df = pd.DataFrame(precios)
-        df = df.rename(columns={"fecha": "ds", "precio": "y"})
-        df["ds"] = pd.to_datetime(df["ds"])
-        model = Prophet()
-        model.fit(df)
-        # Calcular fechas hasta fin de mes y todo el siguiente mes
-        last_real_date = df["ds"].max()
-        today = datetime.today().date()
-        # Primer día del mes siguiente
-        first_next_month = (today.replace(day=1) + timedelta(days=32)).replace(day=1)
-        # Último día del siguiente mes
-        last_next_month = (first_next_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        # Generar fechas desde el último real hasta el último del siguiente mes
-        total_days = (last_next_month - today).days + 1
-        future = model.make_future_dataframe(periods=total_days, freq='D')
-        forecast = model.predict(future)
-        # Combina precios reales y predichos
-        precios_map = {p["fecha"]: p["precio"] for p in precios}
-        precios_completos = []
-        if not isinstance(forecast, pd.DataFrame) or 'ds' not in forecast.columns or 'yhat' not in forecast.columns or len(forecast) < 2:
-            print(f"[ADVERTENCIA] Hotel: {hotel.get('Nombre del Hotel', 'Desconocido')} - forecast no es un DataFrame válido, le faltan columnas o tiene menos de 2 filas.\nDetalles: type={type(forecast)}, columnas={getattr(forecast, 'columns', 'N/A')}, filas={len(forecast) if hasattr(forecast, '__len__') else 'N/A'}")
+        candidatos.append(hotel)
+
+    # Calcular fechas hasta fin de mes y todo el siguiente mes
+    today = datetime.today().date()
+    # Primer día del mes siguiente
+    first_next_month = (today.replace(day=1) + timedelta(days=32)).replace(day=1)
+    # Último día del siguiente mes
+    last_next_month = (first_next_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    # Generar fechas desde el último real hasta el último del siguiente mes
+    total_days = (last_next_month - today).days + 1
+
+    # Prophet: un ajuste por hotel repartido entre procesos; numpy: todos a la vez.
+    # En ambos casos el orden de los pronósticos es el de candidatos
+    forecaster = forecaster or forecast.DEFAULT_FORECASTER
+    workers = workers or forecast.DEFAULT_WORKERS
+    print(f"🔮 Prediciendo {len(candidatos)} hoteles con {forecaster}...")
+    cache = forecast_cache.ForecastCache() if usar_cache and forecast_cache.ENABLED else None
+    claves = [f"{ciudad}|{h['Nombre del Hotel']}" for h in candidatos]
+    with metrics.stage("scrape_hotels", "forecast"):
+        pronosticos = forecast.predecir([h["Precios"] for h in candidatos], total_days, workers, forecaster,
+                                        cache=cache, claves=claves)
+    if cache is not None:
+        print(f"♻️ Caché de pronósticos: {cache.hits} reutilizados, {cache.misses} ajustados")
+
+    validos = []
+    for hotel, forecast_df in zip(candidatos, pronosticos):
+        if not isinstance(forecast_df, pd.DataFrame) or 'ds' not in forecast_df.columns or 'yhat' not in forecast_df.columns or len(forecast_df) < 2:
+            print(f"[ADVERTENCIA] Hotel: {hotel.get('Nombre del Hotel', 'Desconocido')} - forecast no es un DataFrame válido, le faltan columnas o tiene menos de 2 filas.\nDetalles: type={type(forecast_df)}, columnas={getattr(forecast_df, 'columns', 'N/A')}, filas={len(forecast_df) if hasattr(forecast_df, '__len__') else 'N/A'}")
             continue  # o maneja el error como prefieras
-        for _, row in forecast.iterrows():
-            ds_value = row['ds']
-            if isinstance(ds_value, (list, tuple, np.ndarray)):
-                ds_value = ds_value[0]
-            if not hasattr(ds_value, 'strftime'):
-                ds_value = pd.to_datetime(ds_value)
-            fecha_str = ds_value.strftime("%Y-%m-%d")
-            if fecha_str in precios_map:
-                precios_completos.append({"fecha": fecha_str, "precio": precios_map[fecha_str], "tipo": "real"})
-            else:
-                # Solo agregar predicho si la fecha es hoy o futura
-                if hasattr(ds_value, 'date') and ds_value.date() >= today:
-                    yhat_value = row['yhat']
-                    if isinstance(yhat_value, (list, tuple, np.ndarray)):
-                        yhat_value = yhat_value[0]
-                    try:
-                        yhat_value = float(yhat_value)
-                    except Exception:
-                        yhat_value = 0
-                    precios_completos.append({"fecha": fecha_str, "precio": int(round(yhat_value)), "tipo": "predicho"})
+        validos.append((hotel, forecast_df))
+
+    # Combina precios reales y predichos de todos los hoteles en una sola unión
+    combinados = forecast.combinar_precios_lote([h["Precios"] for h, _ in validos],
+                                                [df for _, df in validos], today)
+    resultado_final = []
+    for (hotel, _), precios_completos in zip(validos, combinados):
+        precios = hotel["Precios"]
         promedio = statistics.mean([p["precio"] for p in precios])
         resultado_final.append({
             "nombre": hotel["Nombre del Hotel"],
@@ -249,39 +316,113 @@ def scrape_hotels(user_id, user_jwt=None):
             "created_by": user_id
         })
 
-    # Save to JSON
-    output_dir = "resultados"
-    os.makedirs(output_dir, exist_ok=True)
-    filename = os.path.join(output_dir, "hoteles_tijuana_promedios.json")
+    return resultado_final
+
+def guardar_resultados(ciudad, resultado_final, user_id, user_jwt=None, fechas_reales=None, vistos=None,
+                       corrida=None):
+    """Escribe el JSON de la ciudad y sube sus filas a Supabase.
+
+    ``vistos`` ({fecha: visto}) son las fechas descargadas hoy (en esta corrida
+    o en la que se retomó); solo sus precios reales pasan al historial, con la
+    hora en que se vieron. ``corrida`` es el ``scrape_ts`` que agrupa las filas.
+    """
+    filename = destinos.archivo_resultados(ciudad)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(resultado_final, f, ensure_ascii=False, indent=2)
+
+    print(f"✅ Resultados guardados en {filename}")
+
+    # El JSON se sobrescribe en cada corrida; el historial local conserva todas
+    historial = price_history.PriceHistory()
     try:
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(resultado_final, f, ensure_ascii=False, indent=2)
-        
-        print(f"✅ Resultados guardados en {filename}")
-        print(f"📊 Total de hoteles procesados: {len(resultado_final)}")
-        
-        # Print summary
-        for hotel in resultado_final:
-            estrellas_str = f"⭐ {hotel['estrellas']}" if hotel['estrellas'] else "⭐ N/A"
-            print(f"🏨 {hotel['nombre']} — {estrellas_str} — 💰 ${hotel['precio_promedio']} MXN")
-            
-        # Insertar en Supabase usando requests y user_id validado
-        if SUPABASE_URL and SUPABASE_ANON_KEY:
-            print("\n🌐 Guardando resultados en Supabase...")
-            print("user_id que se usará:", user_id)
-            if user_jwt:
-                print("JWT recibido:", user_jwt)
-                decoded = jwt.decode(user_jwt, options={"verify_signature": False})
-                print("sub del JWT:", decoded.get("sub"))
-            insert_hotels_supabase(user_id, resultado_final, SUPABASE_URL, SUPABASE_ANON_KEY, user_jwt)
-            print(f"🎉 Proceso completado. {len(resultado_final)} hoteles guardados en Supabase.")
-        else:
-            print("⚠️ No se encontró SUPABASE_URL o SUPABASE_ANON_KEY en el entorno.")
+        filas = historial.agregar(ciudad, resultado_final, scrape_ts=corrida, vistos=vistos)
+    finally:
+        historial.close()
+    print(f"🗄️ {filas} precios agregados al historial {historial.path}")
+    print(f"📊 Total de hoteles procesados en {ciudad}: {len(resultado_final)}")
 
-    except Exception as e:
-        print(f"❌ Error guardando resultados: {e}")
+    # Print summary
+    for hotel in resultado_final:
+        estrellas_str = f"⭐ {hotel['estrellas']}" if hotel['estrellas'] else "⭐ N/A"
+        print(f"🏨 {hotel['nombre']} — {estrellas_str} — 💰 ${hotel['precio_promedio']} MXN")
+
+    # Insertar en Supabase usando requests y user_id validado
+    if SUPABASE_URL and SUPABASE_ANON_KEY:
+        print(f"\n🌐 Guardando resultados de {ciudad} en Supabase...")
+        print("user_id que se usará:", user_id)
+        if user_jwt:
+            decoded = jwt.decode(user_jwt, options={"verify_signature": False})
+            print("sub del JWT:", decoded.get("sub"))
+        with metrics.stage("scrape_hotels", "upload"):
+            insert_hotels_supabase(user_id, resultado_final, SUPABASE_URL, SUPABASE_ANON_KEY, user_jwt, fechas_reales)
+        print(f"🎉 Proceso completado. {len(resultado_final)} hoteles de {ciudad} guardados en Supabase.")
+    else:
+        print("⚠️ No se encontró SUPABASE_URL o SUPABASE_ANON_KEY en el entorno.")
+
+def scrape_hotels(user_id, user_jwt=None, browsers=None, fetcher=None, fixtures_dir=None, save_pages=None,
+                  ciudades=None, forecast_workers=None, forecaster=None, cache_pronosticos=True,
+                  incremental=False, politica=None):
+    """Scrape hotel prices from Booking.com para los destinos configurados (o solo ``ciudades``)"""
+    destinos_a_rastrear = destinos.cargar_destinos()
+    if ciudades:
+        nombres = {destinos.slug(c) for c in ciudades}
+        destinos_a_rastrear = [d for d in destinos_a_rastrear if destinos.slug(d["ciudad"]) in nombres]
+        if not destinos_a_rastrear:
+            print(f"❌ Ninguna de {ciudades} está en {destinos.DESTINOS_FILE}")
+            sys.exit(1)
+    print(f"🏨 Iniciando scraping de hoteles en {', '.join(d['ciudad'] for d in destinos_a_rastrear)}...")
+
+    # Un checkpoint por ciudad y día: si la corrida se cae, la siguiente retoma las fechas que faltan
+    hoy = datetime.today().date()
+    corrida = datetime.now().isoformat(timespec='seconds')
+    puntos = {d["ciudad"]: checkpoint.Checkpoint(f"scrape_hotels_{d['ciudad']}", f"{hoy}:{d['dias']}")
+              for d in destinos_a_rastrear}
+    hoteles_por_ciudad, descargadas, completas = crawl_destinos(destinos_a_rastrear, browsers, fetcher, fixtures_dir,
+                                                                save_pages, incremental, politica, puntos)
+
+    resultados = {}
+    for ciudad, hoteles_info in hoteles_por_ciudad.items():
+        print(f"\n🏙️ {ciudad}")
+        resultados[ciudad] = calcular_resultados(hoteles_info, user_id, forecast_workers, forecaster, ciudad,
+                                                 usar_cache=cache_pronosticos)
+    emit("forecast_done", hoteles=sum(len(r) for r in resultados.values()))
+
+    fallidas = []
+    for ciudad, resultado_final in resultados.items():
+        try:
+            guardar_resultados(ciudad, resultado_final, user_id, user_jwt,
+                               descargadas[ciudad] if incremental else None, vistos=descargadas[ciudad],
+                               corrida=corrida)
+        except Exception as e:
+            print(f"❌ Error guardando resultados de {ciudad}: {e}")
+            fallidas.append(ciudad)
+            continue
+        if completas[ciudad]:
+            puntos[ciudad].terminar()
+        else:
+            # Se subió lo que había; el checkpoint queda para retomar solo las fechas que faltan
+            print(f"⚠️ {ciudad}: faltan fechas, la siguiente corrida de hoy las retoma desde el checkpoint")
+            fallidas.append(ciudad)
+    destinos.marcar_actualizado([c for c in resultados if c not in fallidas])
+    if fallidas:
         sys.exit(1)
 
+def run_scheduler(user_id, user_jwt=None, **kwargs):
+    """Rastrea en bucle los destinos cuyo intervalo de refresco venció"""
+    while True:
+        configurados = destinos.cargar_destinos()
+        vencidos = destinos.pendientes(configurados)
+        if vencidos:
+            try:
+                scrape_hotels(user_id, user_jwt, ciudades=[d["ciudad"] for d in vencidos], **kwargs)
+            except SystemExit:
+                # Las ciudades que fallaron no se marcan y se reintentan en la siguiente vuelta
+                print("⚠️ La corrida terminó con errores")
+        espera = destinos.segundos_para_el_siguiente(configurados)
+        print(f"⏰ Siguiente refresco en {espera / 60:.0f} min")
+        time.sleep(max(espera, 60))
+
 def main():
     """Main function"""
     try:
@@ -289,13 +430,42 @@ def main():
         parser = argparse.ArgumentParser()
         parser.add_argument('user_id', help='ID de usuario')
         parser.add_argument('--jwt', help='JWT de usuario (opcional)', default=None)
+        parser.add_argument('--browsers', type=int, default=None,
+                            help='Navegadores en paralelo (por defecto SCRAPE_BROWSERS o 3)')
+        parser.add_argument('--fetcher', choices=booking_fetch.FETCHERS, default=None,
+                            help='browser, http (Chrome solo como respaldo) o fixtures (por defecto SCRAPE_FETCHER)')
+        parser.add_argument('--fixtures', default=None, help='Directorio de páginas guardadas para --fetcher fixtures')
+        parser.add_argument('--save-pages', default=None, help='Guarda cada página descargada en este directorio')
+        parser.add_argument('--forecast-workers', type=int, default=None,
+                            help='Procesos para ajustar Prophet (por defecto FORECAST_WORKERS o núcleos)')
+        parser.add_argument('--forecaster', choices=forecast.FORECASTERS, default=None,
+                            help='Motor de predicción: prophet o numpy (por defecto FORECASTER o prophet)')
+        parser.add_argument('--no-forecast-cache', action='store_true',
+                            help='Reajusta todos los hoteles sin usar resultados/forecast_cache')
+        parser.add_argument('--ciudad', action='append', default=None,
+                            help='Solo esta ciudad de destinos.json (se puede repetir)')
+        parser.add_argument('--schedule', action='store_true',
+                            help='Corre en bucle refrescando cada ciudad según su refrescar_horas')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Solo descarga las fechas vencidas según la política de frescura')
+        parser.add_argument('--frescura', default=None,
+                            help='Política "dias:horas,..." para --incremental (por defecto FRESCURA_POLITICA)')
         args = parser.parse_args()
         user_id = args.user_id
         user_jwt = args.jwt or os.environ.get('USER_JWT')
-        scrape_hotels(user_id, user_jwt)
+        opciones = dict(browsers=args.browsers, fetcher=args.fetcher, fixtures_dir=args.fixtures,
+                        save_pages=args.save_pages, forecast_workers=args.forecast_workers,
+                        forecaster=args.forecaster, cache_pronosticos=not args.no_forecast_cache,
+                        incremental=args.incremental, politica=args.frescura)
+        if args.schedule:
+            run_scheduler(user_id, user_jwt, **opciones)
+        else:
+            scrape_hotels(user_id, user_jwt, ciudades=args.ciudad, **opciones)
     except Exception as e:
         print(f"❌ Error general: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    metrics.forward_to_stdout()
     main()
\ No newline at end of file
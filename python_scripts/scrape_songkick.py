@@ -1,38 +1,26 @@
 import sys
-try:
-    sys.stdout.reconfigure(encoding='utf-8')
-except AttributeError:
-    import io
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-
-try:
-    import json
-    import re
-    from bs4 import BeautifulSoup
-    from geopy.distance import geodesic
-    # Selenium imports
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.wait import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from webdriver_manager.chrome import ChromeDriverManager
-    from selenium.webdriver.chrome.options import Options
-
-    # Argumentos: latitud, longitud, radio_km
-    if len(sys.argv) < 4:
-        print(json.dumps([]))
-        sys.exit(0)
-
-    hotel_lat = float(sys.argv[1])
-    hotel_lon = float(sys.argv[2])
-    radius_km = float(sys.argv[3])
-
-    BASE_URL = "https://www.songkick.com"
-    URL = "https://www.songkick.com/es/metro-areas/31097-mexico-tijuana"
+import json
+from bs4 import BeautifulSoup
+# Selenium imports
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.wait import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from webdriver_manager.chrome import ChromeDriverManager
+from selenium.webdriver.chrome.options import Options
 
+import resource_policy
+
+BASE_URL = "https://www.songkick.com"
+URL = "https://www.songkick.com/es/metro-areas/31097-mexico-tijuana"
+
+
+def scrape_songkick(hotel_lat, hotel_lon, radius_km):
+    """Eventos de Songkick en Tijuana (lista de dicts con nombre, fecha, lugar, enlace y coordenadas)"""
     # Configurar Selenium para modo headless
-    chrome_options = Options()
+    policy = resource_policy.DEFAULT_POLICY
+    chrome_options = policy.chrome_options(Options())
     chrome_options.add_argument('--headless')
     chrome_options.add_argument('--no-sandbox')
     chrome_options.add_argument('--disable-dev-shm-usage')
@@ -43,16 +31,20 @@ try:
     # Iniciar el navegador
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=chrome_options)
-    driver.get(URL)
 
     try:
+        # Misma política que Booking: sin imágenes, fuentes, video ni rastreadores
+        policy.install_selenium(driver)
+        driver.get(URL)
         # Esperar a que los eventos estén presentes
         WebDriverWait(driver, 15).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, "li.event-listings-element"))
         )
         html = driver.page_source
+        policy.medir_selenium(driver)
     finally:
         driver.quit()
+        policy.publicar("scrape_songkick")
 
     soup = BeautifulSoup(html, "html.parser")
 
@@ -107,12 +99,27 @@ try:
             "longitude": lon,
             "distance_km": None
         })
+    return eventos
+
 
-    print(json.dumps(eventos, ensure_ascii=False, indent=2))
-except Exception as e:
-    print("[]")
-    print(f"Error en scraping: {e}", file=sys.stderr)
-    sys.stderr.flush()
-finally:
-    sys.stdout.flush()
-    sys.stderr.flush() 
\ No newline at end of file
+if __name__ == "__main__":
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except AttributeError:
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    try:
+        # Argumentos: latitud, longitud, radio_km
+        if len(sys.argv) < 4:
+            print(json.dumps([]))
+            sys.exit(0)
+        eventos = scrape_songkick(float(sys.argv[1]), float(sys.argv[2]), float(sys.argv[3]))
+        print(json.dumps(eventos, ensure_ascii=False, indent=2))
+    except Exception as e:
+        print("[]")
+        print(f"Error en scraping: {e}", file=sys.stderr)
+        sys.stderr.flush()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
@@ -54,6 +54,10 @@ class EventsFetcher:
                     'genre': event['classifications'][0]['genre']['name'] if 'classifications' in event and event['classifications'] and 'genre' in event['classifications'][0] else '',
                     'price_range': f"{event['priceRanges'][0]['min']} - {event['priceRanges'][0]['max']} {event['priceRanges'][0]['currency']}" if 'priceRanges' in event and event['priceRanges'] else 'N/A'
                 }
+                # Coordenadas del recinto, para ordenar por distancia en /api/events-local
+                location = event['_embedded']['venues'][0].get('location', {}) if '_embedded' in event and event['_embedded'].get('venues') else {}
+                event_info['latitude'] = location.get('latitude')
+                event_info['longitude'] = location.get('longitude')
                 events.append(event_info)
 
         return events
@@ -0,0 +1,139 @@
+"""Cliente HTTP compartido para la API REST de Supabase (PostgREST).
+
+Todas las rutas del backend y los scripts pasan por aquí en lugar de llamar a
+``requests.get/post`` sueltos: una sola ``requests.Session`` con pool de
+conexiones keep-alive, timeouts por defecto y reintentos con backoff ante
+429/5xx. Así una subida de 30 días reutiliza unas pocas conexiones TLS en vez
+de abrir una por lote.
+
+Un POST solo se reintenta si es un upsert (``upsert()``, sesión ``'upsert'``):
+repetir un insert simple cuya respuesta se perdió duplicaría filas.
+"""
+import os
+import threading
+import time
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+
+# (connect, read) en segundos
+DEFAULT_TIMEOUT = (5, float(os.getenv('SUPABASE_TIMEOUT', '30')))
+POOL_SIZE = int(os.getenv('SUPABASE_POOL_SIZE', '10'))
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# Métodos que urllib3 reintenta en cada sesión
+SESSION_RETRY_METHODS = {
+    'default': frozenset(['GET', 'HEAD', 'PATCH', 'PUT', 'DELETE']),
+    'upsert': frozenset(['GET', 'HEAD', 'POST', 'PATCH', 'PUT', 'DELETE']),
+    # Para quien reintenta por su cuenta (upload_pipeline, por lote)
+    'sin_reintentos': None,
+}
+
+_sessions = {}
+_session_lock = threading.Lock()
+
+
+def get_session(name='default') -> requests.Session:
+    """Sesión compartida por todo el proceso (se crea al primer uso); ver ``SESSION_RETRY_METHODS``"""
+    session = _sessions.get(name)
+    if session is None:
+        with _session_lock:
+            session = _sessions.get(name)
+            if session is None:
+                methods = SESSION_RETRY_METHODS[name]
+                if methods is None:
+                    retry = Retry(total=0, raise_on_status=False)
+                else:
+                    retry = Retry(
+                        total=3,
+                        backoff_factor=0.5,
+                        status_forcelist=RETRY_STATUS,
+                        allowed_methods=methods,
+                        respect_retry_after_header=True,
+                        raise_on_status=False
+                    )
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _sessions[name] = session
+    return session
+
+
+def config():
+    """(SUPABASE_URL, SUPABASE_ANON_KEY) del entorno; se leen en cada llamada porque
+    los scripts cargan el .env después de importar este módulo"""
+    return os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_ANON_KEY')
+
+
+@lru_cache(maxsize=256)
+def _auth_headers(api_key, jwt):
+    return {
+        'apikey': api_key,
+        'Authorization': f'Bearer {jwt if jwt else api_key}',
+    }
+
+
+def headers(jwt=None, prefer=None, key=None):
+    """Cabeceras PostgREST: el JWT del usuario si hay (RLS), si no la clave anon"""
+    api_key = key or config()[1]
+    result = dict(_auth_headers(api_key, jwt or None))
+    result['Content-Type'] = 'application/json'
+    if prefer:
+        result['Prefer'] = prefer
+    return result
+
+
+def request(method, table, jwt=None, params=None, json=None, prefer=None, url=None, key=None,
+            timeout=DEFAULT_TIMEOUT, session='default') -> requests.Response:
+    """Petición a ``/rest/v1/<table>`` usando la sesión compartida ``session``.
+
+    ``table`` puede incluir query string (p. ej. ``"hotels?on_conflict=nombre,fecha"``).
+    ``url``/``key`` permiten sobreescribir la configuración del entorno.
+    """
+    base_url, api_key = config()
+    base_url = url or base_url
+    api_key = key or api_key
+    table_name = table.split('?', 1)[0]
+    start = time.perf_counter()
+    status = 'error'
+    try:
+        response = get_session(session).request(
+            method,
+            f'{base_url}/rest/v1/{table}',
+            headers=headers(jwt, prefer, api_key),
+            params=params,
+            json=json,
+            timeout=timeout
+        )
+        status = response.status_code
+        return response
+    finally:
+        metrics.SUPABASE_LATENCY.observe(time.perf_counter() - start, method=method, table=table_name)
+        metrics.SUPABASE_REQUESTS.inc(method=method, table=table_name, status=status)
+
+
+def get(table, **kwargs) -> requests.Response:
+    return request('GET', table, **kwargs)
+
+
+def post(table, json, **kwargs) -> requests.Response:
+    return request('POST', table, json=json, **kwargs)
+
+
+def upsert(table, rows, on_conflict, **kwargs) -> requests.Response:
+    """Inserta o actualiza (merge-duplicates) según las columnas de ``on_conflict``"""
+    params = dict(kwargs.pop('params', None) or {})
+    params['on_conflict'] = on_conflict
+    prefer = ','.join(filter(None, ['resolution=merge-duplicates', kwargs.pop('prefer', None)]))
+    # Repetir un upsert no duplica filas: esta sesión sí reintenta POST
+    kwargs.setdefault('session', 'upsert')
+    return request('POST', table, json=rows, params=params, prefer=prefer, **kwargs)
+
+
+def delete(table, **kwargs) -> requests.Response:
+    return request('DELETE', table, **kwargs)
@@ -0,0 +1,193 @@
+"""Subida por lotes a Supabase con varios lotes en vuelo, tamaño adaptativo y solo filas cambiadas.
+
+``insert_hotels_supabase`` armaba lotes fijos de 100 filas, los enviaba uno tras
+otro y volvía a subir todas las filas aunque no hubieran cambiado. Aquí:
+
+- ``UPLOAD_WORKERS`` lotes se envían a la vez por la sesión compartida de
+  ``supabase_rest`` (sus conexiones keep-alive alcanzan para todos);
+- el tamaño de lote crece mientras Supabase responde rápido, se reduce cuando
+  tarda más de ``UPLOAD_TARGET_SECONDS`` y se parte en dos ante un 413, sin
+  pasar nunca de ``UPLOAD_MAX_BYTES`` de JSON por petición;
+- cada lote fallido se reintenta por su cuenta (``UPLOAD_RETRIES`` veces, con
+  espera creciente) sin frenar a los demás; un error estructural de la tabla
+  ("Could not find the ...") sí detiene la subida. Los lotes van por la sesión
+  ``sin_reintentos`` de ``supabase_rest`` para que urllib3 no los repita además;
+- ``UploadLedger`` recuerda el hash de (nombre, fecha, precio, tipo) de cada
+  fila subida con éxito, y las filas idénticas a la última subida se omiten.
+  ``SUPABASE_UPLOAD_DELTA=0`` desactiva el filtro.
+
+El ledger vive en ``resultados/upload_ledger.json`` separado por tabla y usuario.
+Al guardar se aplican sobre lo que hay en disco solo las filas que registró
+este proceso, así que dos subidas en paralelo no se borran los hashes.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import archivo_json
+import supabase_rest
+
+LEDGER_FILE = os.path.join('resultados', 'upload_ledger.json')
+UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', '4'))
+UPLOAD_BATCH = int(os.getenv('UPLOAD_BATCH', '100'))
+UPLOAD_MIN_BATCH = 10
+UPLOAD_MAX_BATCH = int(os.getenv('UPLOAD_MAX_BATCH', '1000'))
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(1024 * 1024)))
+UPLOAD_TARGET_SECONDS = float(os.getenv('UPLOAD_TARGET_SECONDS', '1.0'))
+UPLOAD_RETRIES = int(os.getenv('UPLOAD_RETRIES', '3'))
+DELTA = os.getenv('SUPABASE_UPLOAD_DELTA', '1') != '0'
+
+HASH_FIELDS = ('nombre', 'fecha', 'precio', 'tipo')
+
+
+def row_hash(row):
+    return hashlib.sha1(json.dumps([row.get(c) for c in HASH_FIELDS]).encode('utf-8')).hexdigest()
+
+
+def _row_key(row):
+    return f"{row['nombre']}|{row['fecha']}"
+
+
+class UploadLedger:
+    def __init__(self, path=LEDGER_FILE):
+        self.path = path
+        data = archivo_json.leer(path, {})
+        self._data = data if isinstance(data, dict) else {}
+        self._registradas = {}
+        self._hoy = None
+
+    def pendientes(self, scope, rows):
+        """Filas de ``rows`` cuyo hash difiere del último subido con éxito"""
+        subidas = self._data.get(scope, {})
+        return [r for r in rows if subidas.get(_row_key(r)) != row_hash(r)]
+
+    def registrar(self, scope, rows):
+        subidas = self._data.setdefault(scope, {})
+        registradas = self._registradas.setdefault(scope, {})
+        for r in rows:
+            subidas[_row_key(r)] = registradas[_row_key(r)] = row_hash(r)
+
+    def descartar_fechas_pasadas(self, hoy):
+        self._hoy = str(hoy)
+        self._data = self._sin_pasadas(self._data)
+
+    def _sin_pasadas(self, data):
+        if self._hoy is None:
+            return data
+        return {scope: {k: h for k, h in filas.items() if k.rsplit('|', 1)[1] >= self._hoy}
+                for scope, filas in data.items()}
+
+    def _fusionar(self, en_disco, data):
+        data = en_disco if isinstance(en_disco, dict) else {}
+        for scope, filas in self._registradas.items():
+            data.setdefault(scope, {}).update(filas)
+        return self._sin_pasadas(data)
+
+    def guardar(self):
+        self._data = archivo_json.guardar(self.path, self._data, fusionar=self._fusionar)
+        self._registradas = {}
+
+
+class _Lote:
+    __slots__ = ('rows', 'intento')
+
+    def __init__(self, rows, intento=0):
+        self.rows = rows
+        self.intento = intento
+
+
+def _enviar(table, lote, on_conflict, espera, **kwargs):
+    if espera:
+        time.sleep(espera)
+    start = time.perf_counter()
+    try:
+        r = supabase_rest.upsert(table, lote.rows, on_conflict, prefer='return=minimal', session='sin_reintentos',
+                                 **kwargs)
+        return r.status_code, r.text, time.perf_counter() - start
+    except Exception as e:  # conexión caída, timeout: se reintenta como un 5xx
+        return None, str(e), time.perf_counter() - start
+
+
+def upload_rows(table, rows, on_conflict, scope=None, ledger=None, workers=UPLOAD_WORKERS,
+                batch_size=UPLOAD_BATCH, on_batch=None, **kwargs):
+    """Sube ``rows`` por lotes concurrentes; devuelve un resumen de la subida.
+
+    ``on_batch(filas, acumulado, total)`` se llama desde el hilo que invoca por
+    cada lote guardado. ``kwargs`` (``jwt``, ``url``, ``key``) van a ``supabase_rest.upsert``.
+    """
+    start = time.perf_counter()
+    total_filas = len(rows)
+    if ledger is not None and scope is not None:
+        rows = ledger.pendientes(scope, rows)
+    resumen = {"filas": total_filas, "omitidas": total_filas - len(rows), "enviadas": 0, "fallidas": 0,
+               "lotes": 0, "reintentos": 0, "abortado": False, "segundos": 0.0}
+    if not rows:
+        return resumen
+
+    bytes_por_fila = max(1, len(json.dumps(rows[:50]).encode('utf-8')) // min(len(rows), 50))
+    max_por_bytes = max(1, UPLOAD_MAX_BYTES // bytes_por_fila)
+    size = max(UPLOAD_MIN_BATCH, min(batch_size, UPLOAD_MAX_BATCH, max_por_bytes))
+    restantes = deque(rows)
+    reintentos = deque()  # lotes que fallaron, con su número de intento
+    acumulado = 0
+
+    def siguiente():
+        if reintentos:
+            return reintentos.popleft()
+        n = min(size, max_por_bytes, len(restantes))
+        return _Lote([restantes.popleft() for _ in range(n)])
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        en_vuelo = {}
+        while True:
+            while not resumen["abortado"] and len(en_vuelo) < workers and (reintentos or restantes):
+                lote = siguiente()
+                espera = 0.5 * 2 ** (lote.intento - 1) if lote.intento else 0
+                en_vuelo[pool.submit(_enviar, table, lote, on_conflict, espera, **kwargs)] = lote
+            if not en_vuelo:
+                break
+            listos, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            for fut in listos:
+                lote = en_vuelo.pop(fut)
+                status, texto, segundos = fut.result()
+                resumen["lotes"] += 1
+                if status in (200, 201, 204):
+                    acumulado += len(lote.rows)
+                    resumen["enviadas"] += len(lote.rows)
+                    if ledger is not None and scope is not None:
+                        ledger.registrar(scope, lote.rows)
+                    if segundos < UPLOAD_TARGET_SECONDS / 2:
+                        size = min(UPLOAD_MAX_BATCH, int(size * 1.5) + 1)
+                    elif segundos > UPLOAD_TARGET_SECONDS:
+                        size = max(UPLOAD_MIN_BATCH, size // 2)
+                    print(f"✅ Lote de {len(lote.rows)} filas guardado en {segundos:.2f}s "
+                          f"[{acumulado}/{len(rows)}] (siguiente: {size})")
+                    if on_batch:
+                        on_batch(len(lote.rows), acumulado, len(rows))
+                    continue
+                print(f"❌ Error guardando lote de {len(lote.rows)} filas: {status} {texto[:300]}")
+                if texto and "Could not find the" in texto:
+                    print("Error estructural en la base de datos. Abortando el guardado masivo.")
+                    resumen["abortado"] = True
+                    resumen["fallidas"] += len(lote.rows)
+                elif status == 413 and len(lote.rows) > 1:
+                    # Payload demasiado grande: partir el lote y bajar el límite para los siguientes
+                    mitad = len(lote.rows) // 2
+                    max_por_bytes = max(1, min(max_por_bytes, mitad))
+                    size = max(1, min(size, mitad))
+                    reintentos.append(_Lote(lote.rows[:mitad], lote.intento))
+                    reintentos.append(_Lote(lote.rows[mitad:], lote.intento))
+                elif lote.intento < UPLOAD_RETRIES and (status is None or status == 413 or status >= 500
+                                                        or status == 429):
+                    resumen["reintentos"] += 1
+                    reintentos.append(_Lote(lote.rows, lote.intento + 1))
+                else:
+                    resumen["fallidas"] += len(lote.rows)
+
+    if resumen["abortado"]:
+        resumen["fallidas"] += len(restantes) + sum(len(l.rows) for l in reintentos)
+    resumen["segundos"] = round(time.perf_counter() - start, 3)
+    return resumen
@@ -0,0 +1,114 @@
+"""Caché de respuestas por usuario para los GET que el dashboard consulta seguido.
+
+Cada entrada se guarda bajo (sub del JWT, huella del JWT, consulta), con TTL y
+desalojo LRU. La huella evita que un JWT falsificado con el ``sub`` de otro
+usuario lea su caché: solo el mismo token (ya validado por Supabase en la
+primera consulta) vuelve a encontrar la entrada. Las invalidaciones se hacen
+por ``sub``.
+
+Con ``shm_name`` la caché se apoya en un bloque de memoria compartida con una
+marca de tiempo de invalidación por usuario (hash en ranuras fijas): los datos
+siguen siendo locales a cada worker, pero una escritura en un worker invalida
+las entradas de ese usuario en todos.
+"""
+import base64
+import hashlib
+import json
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+ANON = 'anon'
+
+
+def jwt_subject(token):
+    """``sub`` del JWT sin verificar la firma (solo se usa como clave de caché)"""
+    if not token:
+        return ANON
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload)).get('sub') or ANON
+    except (IndexError, ValueError, AttributeError):
+        return ANON
+
+
+class _SharedInvalidations:
+    """Marcas de invalidación por usuario en memoria compartida entre procesos"""
+    SLOTS = 4096
+
+    def __init__(self, name):
+        from multiprocessing import shared_memory
+        size = self.SLOTS * 8
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self._shm.buf[:size] = bytes(size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+
+    def _offset(self, user):
+        return (zlib.crc32(user.encode('utf-8')) % self.SLOTS) * 8
+
+    def mark(self, user):
+        # Se escribe un timestamp (no un contador): no hay lectura-modificación-escritura entre procesos
+        struct.pack_into('<Q', self._shm.buf, self._offset(user), time.time_ns())
+
+    def invalidated_at(self, user):
+        return struct.unpack_from('<Q', self._shm.buf, self._offset(user))[0]
+
+
+class ResponseCache:
+    def __init__(self, ttl=30.0, max_entries=512, shm_name=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._shared = None
+        if shm_name:
+            try:
+                self._shared = _SharedInvalidations(shm_name)
+            except Exception as e:
+                print(f"[response_cache] Sin memoria compartida ({e}); invalidación solo local")
+
+    def _key(self, token, query):
+        fingerprint = hashlib.sha1(token.encode('utf-8')).hexdigest() if token else ''
+        return (jwt_subject(token), fingerprint, query)
+
+    def get(self, token, query):
+        """Valor cacheado para (token, query) o None si no hay o expiró"""
+        key = self._key(token, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, created_ns = entry
+            if expires_at < time.monotonic() or (
+                    self._shared is not None and self._shared.invalidated_at(key[0]) >= created_ns):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, token, query, value):
+        key = self._key(token, query)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl, time.time_ns())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user):
+        """Descarta todas las entradas del usuario (``sub``/user_id) en este y, si hay memoria compartida, en los demás workers"""
+        if not user:
+            return
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user]:
+                del self._entries[key]
+        if self._shared is not None:
+            self._shared.mark(user)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
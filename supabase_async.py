@@ -0,0 +1,82 @@
+"""Versión asíncrona de ``supabase_rest`` para el servidor ASGI.
+
+Clientes ``httpx.AsyncClient`` compartidos con conexiones keep-alive
+(HTTP/1.1), los mismos timeouts y la misma política de reintentos con backoff
+ante 429/5xx. Las cabeceras se arman con ``supabase_rest.headers`` y las
+llamadas se registran en las mismas métricas.
+
+Las ``POOL_SIZE * 4`` conexiones se reparten en ``POOL_SHARDS`` clientes de
+``POOL_SIZE`` cada uno, y las peticiones que esperan conexión hacen fila en
+el semáforo de su cliente, no dentro de httpcore. El pool de httpcore recorre
+todas sus conexiones contra todas (y su fila contra todas) cada vez que una
+petición entra o sale: con un solo pool de 40 conexiones y cientos de
+usuarios del dashboard, ese costo cuadrático dejaba al servidor ASGI por
+debajo de Flask. Todas las conexiones se mantienen vivas para no abrir una
+nueva por petición.
+"""
+import asyncio
+import itertools
+import time
+
+import httpx
+
+import metrics
+import supabase_rest
+
+POOL_SHARDS = 4
+
+_shards = None
+_next_shard = None
+
+
+def _shard():
+    """(cliente, semáforo) que atiende la siguiente petición, por turnos"""
+    global _shards, _next_shard
+    if _shards is None:
+        connect, read = supabase_rest.DEFAULT_TIMEOUT
+        size = supabase_rest.POOL_SIZE
+        _shards = [
+            (httpx.AsyncClient(timeout=httpx.Timeout(read, connect=connect),
+                               limits=httpx.Limits(max_connections=size, max_keepalive_connections=size)),
+             asyncio.Semaphore(size))
+            for _ in range(POOL_SHARDS)
+        ]
+        _next_shard = itertools.cycle(_shards)
+    return next(_next_shard)
+
+
+async def aclose():
+    global _shards, _next_shard
+    if _shards is not None:
+        for client, _ in _shards:
+            await client.aclose()
+        _shards = _next_shard = None
+
+
+async def request(method, table, jwt=None, params=None, json=None, prefer=None, retries=3) -> httpx.Response:
+    """Petición a ``/rest/v1/<table>``; reintenta 429/5xx con backoff exponencial (respeta Retry-After)"""
+    base_url, api_key = supabase_rest.config()
+    table_name = table.split('?', 1)[0]
+    url = f'{base_url}/rest/v1/{table}'
+    headers = supabase_rest.headers(jwt, prefer)
+    start = time.perf_counter()
+    status = 'error'
+    try:
+        for attempt in range(retries + 1):
+            client, slots = _shard()
+            async with slots:
+                response = await client.request(method, url, headers=headers, params=params, json=json)
+            status = response.status_code
+            if status not in supabase_rest.RETRY_STATUS or attempt == retries:
+                return response
+            retry_after = response.headers.get('Retry-After')
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else 0.5 * (2 ** attempt)
+            await asyncio.sleep(delay)
+        return response
+    finally:
+        metrics.SUPABASE_LATENCY.observe(time.perf_counter() - start, method=method, table=table_name)
+        metrics.SUPABASE_REQUESTS.inc(method=method, table=table_name, status=status)
+
+
+async def get(table, **kwargs) -> httpx.Response:
+    return await request('GET', table, **kwargs)
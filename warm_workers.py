@@ -0,0 +1,227 @@
+"""Pool de procesos "calientes" para los scrapers.
+
+Lanzar ``python python_scripts/<script>.py`` por cada petición obliga a
+reimportar prophet, pandas, selenium, playwright y supabase y a releer el
+``.env`` antes de hacer nada. Este pool arranca sus procesos una sola vez con
+esos módulos ya cargados y ejecuta ``scrape_hotels.scrape_hotels``,
+``hotel_propio.main`` y ``scrape_eventos.run_events_pipeline`` como llamadas
+a función. La salida de cada tarea se reenvía línea por línea al job que la
+lanzó, igual que la de un subproceso.
+
+Si un script no se puede importar al arrancar (p. ej. ``hotel_propio`` sin las
+variables de Supabase), el worker arranca igual: solo fallan las tareas de ese
+tipo, al importarlo de nuevo. Prophet abre su propio pool de procesos dentro
+de cada worker, así que ``scrape_hotels`` recibe ``forecast_workers`` igual a
+los núcleos repartidos entre todos los workers calientes del proceso.
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from job_queue import SCRIPTS_DIR
+
+# Módulos pesados que cada worker importa al arrancar
+PRELOAD_MODULES = ['pandas', 'numpy', 'prophet', 'selenium.webdriver', 'playwright.async_api', 'supabase', 'bs4']
+# Scripts que se precargan; _run_task los vuelve a importar según el tipo de tarea
+SCRIPT_MODULES = ['scrape_hotels', 'hotel_propio', 'scrape_eventos']
+
+# Código equivalente al arranque de un subproceso de scraping, para medir su costo
+_SUBPROCESS_PROBE = (
+    "import time, importlib; t = time.perf_counter()\n"
+    "from dotenv import load_dotenv; load_dotenv()\n"
+    "for m in {modules!r}:\n"
+    "    try: importlib.import_module(m)\n"
+    "    except ImportError: pass\n"
+    "print(time.perf_counter() - t)\n"
+)
+
+# Estado global dentro de cada proceso worker
+_log_queue = None
+_current_job = None
+_preload_seconds = None
+
+
+class _QueueWriter(io.TextIOBase):
+    """stdout del worker: cada línea completa se envía al proceso padre etiquetada con el job"""
+
+    def __init__(self, queue):
+        self._queue = queue
+        self._buffer = ''
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self._buffer += text
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            if _current_job is not None:
+                self._queue.put((_current_job, line))
+        return len(text)
+
+    def flush(self):
+        if self._buffer and _current_job is not None:
+            self._queue.put((_current_job, self._buffer))
+        self._buffer = ''
+
+
+def _init_worker(log_queue):
+    global _log_queue, _preload_seconds
+    _log_queue = log_queue
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+    start = time.perf_counter()
+    from dotenv import load_dotenv
+    load_dotenv()
+    for module in PRELOAD_MODULES + SCRIPT_MODULES:
+        # Cualquier error aquí rompería el pool entero (BrokenProcessPool) para todos los tipos de tarea
+        try:
+            __import__(module)
+        except Exception as e:
+            print(f"[warm_workers] No se pudo precargar {module}: {e}", file=sys.stderr)
+    _preload_seconds = time.perf_counter() - start
+    sys.stdout = _QueueWriter(log_queue)
+    import metrics
+    metrics.forward_to_stdout()
+
+
+def _run_task(job_id, kind, kwargs, submitted_at):
+    """Ejecuta una tarea de scraping dentro del worker"""
+    global _current_job
+    dispatch_seconds = time.time() - submitted_at
+    _current_job = job_id
+    start = time.perf_counter()
+    try:
+        if kind == 'scrape-hotels':
+            import scrape_hotels
+            scrape_hotels.scrape_hotels(kwargs['user_id'], kwargs.get('user_jwt'), fetcher=kwargs.get('fetcher'),
+                                        forecast_workers=kwargs.get('forecast_workers'))
+            result = None
+        elif kind == 'scrape-hotel-propio':
+            import hotel_propio
+            result = asyncio.run(hotel_propio.main(
+                kwargs['user_id'], kwargs['hotel_name'],
+                kwargs.get('headless_mode', 'new'), kwargs.get('jwt', '')
+            ))
+        elif kind == 'scrape-eventos':
+            import scrape_eventos
+            result = scrape_eventos.run_events_pipeline(
+                kwargs['hotel_name'], int(kwargs['radius']), kwargs.get('user_jwt')
+            )
+        else:
+            raise ValueError(f'Tipo de tarea desconocido: {kind}')
+    except SystemExit as e:
+        # Los scripts usan sys.exit(1) para señalar errores; aquí no debe matar al worker
+        raise RuntimeError(f'El script terminó con sys.exit({e.code})')
+    finally:
+        sys.stdout.flush()
+        _current_job = None
+    return {
+        'value': result,
+        'pid': os.getpid(),
+        'preload_seconds': _preload_seconds,
+        'dispatch_seconds': dispatch_seconds,
+        'run_seconds': time.perf_counter() - start,
+    }
+
+
+class WarmWorkerPool:
+    # Workers calientes de todos los pools de este proceso, para repartir los núcleos entre ellos
+    _total_workers = 0
+    _total_lock = threading.Lock()
+
+    def __init__(self, max_workers=2):
+        self._max_workers = max_workers
+        with WarmWorkerPool._total_lock:
+            WarmWorkerPool._total_workers += max_workers
+        self._ctx = multiprocessing.get_context('spawn')
+        self._log_queue = self._ctx.Queue()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._line_handlers = {}
+        self._stats = {'tasks': 0, 'preload_seconds': None, 'dispatch_seconds_total': 0.0,
+                       'subprocess_startup_seconds': None}
+        self._start_executor()
+        threading.Thread(target=self._drain_logs, name='warm-workers-log', daemon=True).start()
+
+    def _start_executor(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._max_workers,
+            mp_context=self._ctx,
+            initializer=_init_worker,
+            initargs=(self._log_queue,)
+        )
+
+    def _drain_logs(self):
+        while True:
+            job_id, line = self._log_queue.get()
+            handler = self._line_handlers.get(job_id)
+            if handler is None:
+                continue
+            try:
+                handler(line)
+            except Exception as e:
+                # Un handler que falla no debe matar este hilo: se perderían las líneas de todos los jobs
+                print(f"[warm_workers] Error procesando una línea del job {job_id}: {e}", file=sys.stderr)
+
+    @classmethod
+    def forecast_workers(cls):
+        """Procesos de Prophet por tarea para no pasar de un proceso por núcleo entre todos los workers"""
+        with cls._total_lock:
+            total = cls._total_workers
+        return max(1, (os.cpu_count() or 1) // max(1, total))
+
+    def run(self, job_id, kind, kwargs, on_line):
+        """Ejecuta la tarea en un worker caliente y bloquea hasta que termine"""
+        self._line_handlers[job_id] = on_line
+        if kind == 'scrape-hotels' and kwargs.get('forecast_workers') is None:
+            kwargs = dict(kwargs, forecast_workers=self.forecast_workers())
+        try:
+            with self._lock:
+                executor = self._executor
+            try:
+                future = executor.submit(_run_task, job_id, kind, kwargs, time.time())
+                outcome = future.result()
+            except BrokenProcessPool:
+                # Un worker murió (p. ej. por falta de memoria): se reconstruye el pool
+                with self._lock:
+                    if self._executor is executor:
+                        self._start_executor()
+                raise
+            with self._lock:
+                self._stats['tasks'] += 1
+                self._stats['preload_seconds'] = outcome['preload_seconds']
+                self._stats['dispatch_seconds_total'] += outcome['dispatch_seconds']
+            return outcome
+        finally:
+            # Las últimas líneas pueden llegar un poco después del resultado
+            threading.Timer(1.0, self._line_handlers.pop, args=(job_id, None)).start()
+
+    def measure_subprocess_startup(self):
+        """Mide cuánto tarda un intérprete nuevo en importar lo mismo que precargan los workers"""
+        probe = _SUBPROCESS_PROBE.format(modules=PRELOAD_MODULES)
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True)
+        wall = time.perf_counter() - start
+        with self._lock:
+            self._stats['subprocess_startup_seconds'] = wall if result.returncode == 0 else None
+        return wall
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        total_dispatch = stats.pop('dispatch_seconds_total')
+        stats['avg_dispatch_seconds'] = total_dispatch / stats['tasks'] if stats['tasks'] else None
+        stats['max_workers'] = self._max_workers
+        if stats['subprocess_startup_seconds'] is not None and stats['avg_dispatch_seconds'] is not None:
+            stats['startup_saving_seconds'] = stats['subprocess_startup_seconds'] - stats['avg_dispatch_seconds']
+        else:
+            stats['startup_saving_seconds'] = None
+        return stats